@@ -99,16 +99,16 @@ class MyBrandNewChannelRun(DevelopmentVersionBaseCommand):
 
     def run(self, command):
         sublime.active_window().run_command( "show_panel", {"panel": "console", "toggle": False} )
-        submodules_manager.main( command )
+        submodules_manager.main( command, get_channel_file_setting( "submodules_manager_jobs", 1 ) )
 
 
 class MyBrandNewChannelGenerateChannelFile(DevelopmentVersionBaseCommand):
 
-    def run(self, command="all"):
+    def run(self, command="all", shard_index=0, shard_count=0):
         sublime.active_window().run_command( "show_panel", {"panel": "console", "toggle": False} )
 
         if load_channel_settings():
-            channel_manager.main( g_channelSettings, command )
+            channel_manager.main( g_channelSettings, command, shard_index, shard_count )
 
         else:
             log( 1, "Error: Could not load the settings files! g_channelSettings:", str( g_channelSettings ) )
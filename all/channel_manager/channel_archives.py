@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# These lines allow to use UTF-8 encoding and run this file with `./update.py`, instead of `python update.py`
+# https://stackoverflow.com/questions/7670303/purpose-of-usr-bin-python3
+# https://stackoverflow.com/questions/728891/correct-way-to-define-python-source-code-encoding
+#
+#
+
+#
+# Licensing
+#
+# Channel Manager Archives, create and checksum the channel packages releases archives
+# Copyright (C) 2017 Evandro Coan <https://github.com/evandrocoan>
+#
+#  This program is free software; you can redistribute it and/or modify it
+#  under the terms of the GNU General Public License as published by the
+#  Free Software Foundation; either version 3 of the License, or ( at
+#  your option ) any later version.
+#
+#  This program is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import hashlib
+import tempfile
+import posixpath
+import threading
+import subprocess
+import multiprocessing
+
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+
+from . import settings as g_settings
+from .channel_utilities import get_startup_info
+from .parallel_utilities import get_cancellation_token
+from .parallel_utilities import use_cancellation_token
+
+from debug_tools import getLogger
+from debug_tools.third_part import load_data_file
+from debug_tools.third_part import write_data_file
+
+
+# Debugger settings: 0 - disabled, 127 - enabled
+log = getLogger( 127, __name__ )
+
+RELEASES_CHECKSUMS_FILE = os.path.join( g_settings.PACKAGE_ROOT_DIRECTORY, "all", "releases_checksums.json" )
+ARCHIVE_CHUNK_SIZE      = 64 * 1024
+
+
+def get_maximum_workers(channel_settings):
+    return channel_settings.get( 'CHANNEL_MAXIMUM_WORKERS', 0 ) or multiprocessing.cpu_count()
+
+
+def get_tag_object_id(absolute_path, git_tag):
+    """
+        @return the object id of the annotated tag, or the commit id for lightweight tags, or `None`
+                when the tag does not exist.
+    """
+    command = [ "git", "rev-parse", "--verify", "--quiet", "refs/tags/%s" % git_tag ]
+
+    try:
+        output = subprocess.check_output( command, cwd=absolute_path, startupinfo=get_startup_info() )
+
+    except( OSError, subprocess.CalledProcessError ):
+        return None
+
+    return output.decode( 'utf-8' ).strip() or None
+
+
+def iterate_archive_chunks(absolute_path, git_tag):
+    """
+        Stream the zip archive created by `git archive` for the `git_tag`, without holding the whole
+        file in memory. The errors go to a temporary file, as a full stderr pipe would block `git`
+        while the archive is still being read.
+    """
+    command = [ "git", "archive", "--format=zip", "refs/tags/%s" % git_tag ]
+    errors_file = tempfile.TemporaryFile()
+
+    try:
+        process = subprocess.Popen( command, cwd=absolute_path, stdout=subprocess.PIPE,
+                stderr=errors_file, startupinfo=get_startup_info() )
+
+    except Exception:
+        errors_file.close()
+        raise
+
+    cancellation_token = get_cancellation_token()
+
+    if not cancellation_token.register( process ):
+        process.terminate()
+
+    try:
+
+        while True:
+            chunk = process.stdout.read( ARCHIVE_CHUNK_SIZE )
+
+            if not chunk:
+                break
+
+            yield chunk
+
+    finally:
+        process.stdout.close()
+
+        returncode = process.wait()
+        cancellation_token.unregister( process )
+
+        errors_file.seek( 0 )
+        errors = errors_file.read()
+        errors_file.close()
+
+        if returncode != 0:
+            raise RuntimeError( "git archive failed for `%s` at `%s`: %s" % (
+                    git_tag, absolute_path, errors.decode( 'utf-8', 'replace' ).strip() ) )
+
+
+def compute_archive_checksum(absolute_path, git_tag, artifact_path=None):
+    """
+        The zip file created by `git archive` has all the files on its root directory, therefore, it
+        is also a valid `.sublime-package` file.
+
+        @param artifact_path   if not `None`, the archive is also saved on this file path
+        @return (sha256, size) of the `git archive` zip file for the `git_tag`
+    """
+    size   = 0
+    sha256 = hashlib.sha256()
+
+    if artifact_path:
+        temporary_path = artifact_path + ".tmp"
+        artifact_directory = os.path.dirname( artifact_path )
+
+        if not os.path.isdir( artifact_directory ):
+            os.makedirs( artifact_directory, exist_ok=True )
+
+        artifact_file = open( temporary_path, "wb" )
+
+    try:
+
+        for chunk in iterate_archive_chunks( absolute_path, git_tag ):
+            size += len( chunk )
+            sha256.update( chunk )
+
+            if artifact_path:
+                artifact_file.write( chunk )
+
+    except Exception:
+
+        if artifact_path:
+            artifact_file.close()
+            os.remove( temporary_path )
+
+        raise
+
+    if artifact_path:
+        artifact_file.close()
+        os.replace( temporary_path, artifact_path )
+
+    return sha256.hexdigest(), size
+
+
+def get_artifact_name(package_name, git_tag):
+    return "%s-%s.sublime-package" % ( package_name, git_tag.replace( "/", "_" ) )
+
+
+class ReleasesArchiver(object):
+    """
+        Computes the `sha256` and `size` of each release archive, caching the results by the
+        repository name and the release tag object id, as a tag object id always yields the
+        same archive contents.
+
+        When the setting `CHANNEL_ARTIFACTS_DIRECTORY` is set, the archives are also saved as
+        `.sublime-package` files on it and, when the setting `CHANNEL_ARTIFACTS_URL` is set, the
+        releases URLs are rewritten to point to these files on that base URL.
+    """
+
+    def __init__(self, channel_settings):
+        self.channel_settings = channel_settings
+        self.cache_lock = threading.Lock()
+
+        self.artifacts_directory = channel_settings.get( 'CHANNEL_ARTIFACTS_DIRECTORY' )
+        self.artifacts_url       = channel_settings.get( 'CHANNEL_ARTIFACTS_URL' )
+
+        self.cache = load_data_file( RELEASES_CHECKSUMS_FILE )
+        self.failed_releases = []
+
+    def process(self, releases_jobs):
+        """
+            @param releases_jobs   a list of tuples `(package_name, absolute_path, git_tag, release_data)`
+                                   where `release_data` is the dictionary to receive the checksums.
+        """
+        maximum_workers = get_maximum_workers( self.channel_settings )
+        log( 1, "Computing %d releases checksums with %d workers...", len( releases_jobs ), maximum_workers )
+
+        cancellation_token = get_cancellation_token()
+
+        def process_release(release_job):
+
+            with use_cancellation_token( cancellation_token ):
+                self._process_release( release_job )
+
+        with ThreadPoolExecutor( max_workers=maximum_workers ) as executor:
+            list( executor.map( process_release, releases_jobs ) )
+
+        # Other shards can be processed at the same time, then merge their new checksums
+        cache = load_data_file( RELEASES_CHECKSUMS_FILE )
+        cache.update( self.cache )
+        write_data_file( RELEASES_CHECKSUMS_FILE, cache )
+
+        for package_name, git_tag, error in self.failed_releases:
+            log( 1, "Error: Could not compute the `%s` release `%s` checksum: %s", package_name, git_tag, error )
+
+    def _process_release(self, release_job):
+        package_name, absolute_path, git_tag, release_data = release_job
+
+        # Do not publish some other archive checksum when this one cannot be computed
+        release_data.pop( 'sha256', None )
+        release_data.pop( 'size', None )
+
+        try:
+            checksum = self.get_checksum( package_name, absolute_path, git_tag )
+
+        except Exception as error:
+            self.failed_releases.append( (package_name, git_tag, error) )
+            return
+
+        if checksum:
+            release_data['sha256'] = checksum['sha256']
+            release_data['size']   = checksum['size']
+
+            if self.artifacts_directory and self.artifacts_url:
+                release_data['url'] = self.get_artifact_url( package_name, git_tag )
+
+    def get_artifact_path(self, package_name, git_tag):
+
+        if self.artifacts_directory:
+            return os.path.join( self.artifacts_directory, package_name, get_artifact_name( package_name, git_tag ) )
+
+        return None
+
+    def get_artifact_url(self, package_name, git_tag):
+        artifact_name = get_artifact_name( package_name, git_tag )
+        return posixpath.join( self.artifacts_url, quote( package_name ), quote( artifact_name ) )
+
+    def get_checksum(self, package_name, absolute_path, git_tag):
+        tag_object_id = get_tag_object_id( absolute_path, git_tag )
+
+        if not tag_object_id:
+            log( 1, "Warning: Skipping the checksum of the missing tag `%s` on `%s`", git_tag, package_name )
+            return None
+
+        cache_key = "%s %s" % ( package_name, tag_object_id )
+        artifact_path = self.get_artifact_path( package_name, git_tag )
+
+        with self.cache_lock:
+            checksum = self.cache.get( cache_key )
+
+        # The artifact is already built when its file has the cached size
+        if checksum and ( not artifact_path
+                or os.path.exists( artifact_path ) and os.path.getsize( artifact_path ) == checksum['size'] ):
+            return checksum
+
+        sha256, size = compute_archive_checksum( absolute_path, git_tag, artifact_path )
+        checksum = { "sha256": sha256, "size": size }
+
+        with self.cache_lock:
+            self.cache[cache_key] = checksum
+
+        return checksum
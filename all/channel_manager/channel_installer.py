@@ -94,6 +94,11 @@ from .channel_utilities import is_dependency
 from .channel_utilities import is_package_dependency
 from .channel_utilities import run_on_main_thread
 
+from .channel_archives import get_maximum_workers
+from .git_utilities import update_mirrors
+from .git_utilities import get_reference_arguments
+from .job_scheduler import run_job
+
 
 # When there is an ImportError, means that Package Control is installed instead of PackagesManager,
 # or vice-versa. Which means we cannot do nothing as this is only compatible with PackagesManager.
@@ -178,6 +183,9 @@ class ChannelInstaller(threading.Thread):
         self.commandLineInterface     = cmd.Cli( None, True )
         self.uningoredPackagesToFlush = 0
 
+        # The local bare mirrors of the repositories URLs, used as reference while cloning them
+        self.mirrors = {}
+
         self.ensure_packagesmanager_on_last_positoin()
 
 
@@ -336,13 +344,16 @@ class ChannelInstaller(threading.Thread):
             https://stackoverflow.com/questions/986616/python-thread-exit-code
         """
 
-        if is_allowed_to_run():
+        # Changing the installed packages conflicts with all other commands, then wait them finish
+        with run_job( "channel_installer" ) as is_allowed:
 
-            if self.channelSettings['INSTALLATION_TYPE'] == "upgrade":
-                self._upgrade()
+            if is_allowed and _lock_installer():
 
-            else:
-                self._run()
+                if self.channelSettings['INSTALLATION_TYPE'] == "upgrade":
+                    self._upgrade()
+
+                else:
+                    self._run()
 
 
     def _run(self):
@@ -652,7 +663,7 @@ class ChannelInstaller(threading.Thread):
                         log( 1, "Installing: %s" % ( str( url ) ) )
                         non_packages_names.append( package_name )
 
-                        command = shlex.split( '"%s" clone "%s" "%s"' % ( self.gitExecutablePath, url, path ) )
+                        command = self.get_clone_command( url, path )
                         output  = str( self.commandLineInterface.execute( command, cwd=root ) )
 
                         self.add_folders_and_files_for_removal( submodule_absolute_path, path )
@@ -760,12 +771,60 @@ class ChannelInstaller(threading.Thread):
         if os.path.isdir( channel_temporary_folder ):
             shutil.rmtree( channel_temporary_folder, onerror=_delete_read_only_file )
 
-        command = shlex.split( '"%s" clone "%s" "%s"' % ( self.gitExecutablePath, url, temp ) )
+        command = self.get_clone_command( url, temp )
         output  = str( self.commandLineInterface.execute( command, cwd=root ) )
 
         log( 1, "download_repository_to_folder, output: " + str( output ) )
 
 
+    def get_clone_command(self, url, path, *arguments):
+        """
+            When there is a local mirror for the `url`, clone it reading the objects from the mirror,
+            instead of downloading all of them.
+        """
+        return [ self.gitExecutablePath, "clone" ] + get_reference_arguments( self.mirrors.get( url ) ) \
+                + list( arguments ) + [ url, path ]
+
+
+    def update_mirrors_cache(self, packages_infos):
+        """
+            Create or update the local mirrors of all the repositories to clone, when the setting
+            `CHANNEL_MIRRORS_DIRECTORY` is set.
+        """
+        mirrors_directory = self.channelSettings.get( 'CHANNEL_MIRRORS_DIRECTORY' )
+
+        if not mirrors_directory:
+            return
+
+        root  = self.channelSettings['CHANNEL_ROOT_DIRECTORY']
+        urls  = [ url for _, url, _ in packages_infos ]
+        urls += [ url for _, url, _ in self.get_not_packages_submodules( root ) ]
+
+        self.mirrors = update_mirrors( mirrors_directory, urls, get_maximum_workers( self.channelSettings ),
+                self.gitExecutablePath )
+
+
+    def get_not_packages_submodules(self, root):
+        """
+            Returns the `(name, url, path)` of the submodules which are not a package and which were
+            not cloned yet.
+        """
+        submodules     = []
+        gitFilePath    = os.path.join( root, '.gitmodules' )
+        gitModulesFile = configparser.RawConfigParser()
+
+        gitModulesFile.read( gitFilePath )
+
+        for section in gitModulesFile.sections():
+            url  = gitModulesFile.get( section, "url" )
+            path = gitModulesFile.get( section, "path" )
+
+            if 'Packages' != path[0:8] and is_directory_empty( os.path.join( root, path ) ):
+                submodules.append( ( os.path.basename( path ), url, path ) )
+
+        return submodules
+
+
     def install_development_packages(self, packages_infos, non_packages_to_uninstall):
         root = self.channelSettings['CHANNEL_ROOT_DIRECTORY']
         temp = self.channelSettings['TEMPORARY_FOLDER_TO_USE']
@@ -776,6 +835,7 @@ class ChannelInstaller(threading.Thread):
         self.set_default_settings( packages_names, packages_infos, non_packages_to_uninstall )
 
         log( 2, "install_development_packages, packages_infos: " + str( packages_infos ) )
+        self.update_mirrors_cache( packages_infos )
         self.download_not_packages_submodules()
 
         current_index      = 0
@@ -815,7 +875,7 @@ class ChannelInstaller(threading.Thread):
                     continue
 
             else:
-                command = shlex.split( '"%s" clone --recursive "%s" "%s"' % ( self.gitExecutablePath, url, path) )
+                command = self.get_clone_command( url, path, "--recursive" )
                 result  = self.commandLineInterface.execute( command, cwd=root )
 
                 if result is False:
@@ -1903,11 +1963,18 @@ def _unlock_installer(self, is_forced=False):
         g_is_running = 0
 
 
-def is_allowed_to_run():
+def _lock_installer():
+    """
+        Set all the flags, which are unlocked by the installation steps still running after the
+        installer thread and its job finished. Only one installer job runs at a time, then there is
+        no race between checking and setting them.
+
+        @return False when the last installation steps are still running
+    """
     global g_is_running
 
     if g_is_running:
-        log( 1, "You are already running a command. Wait until it finishes or restart Sublime Text" )
+        log( 1, "The last installation is not finished yet. Wait until it finishes or restart Sublime Text" )
         return False
 
     g_is_running = ALL_RUNNING_CONTROL_FLAGS
@@ -32,12 +32,15 @@ import sublime_plugin
 
 import os
 import sys
+import copy
 import time
 import datetime
 import json
 import threading
 
 import re
+import zlib
+import glob
 import shlex
 import configparser
 import contextlib
@@ -46,10 +49,22 @@ from collections import OrderedDict
 from distutils.version import LooseVersion
 
 from . import settings as g_settings
-g_is_already_running = False
 g_failed_repositories = []
+g_network_policy = None
 
 from .channel_utilities import load_repository_file
+from .channel_utilities import get_git_directory
+from .channel_utilities import get_modified_time
+from .channel_archives import ReleasesArchiver
+from .git_utilities import get_network_policy
+from .git_utilities import MAXIMUM_PER_HOST
+from .git_utilities import MAXIMUM_RETRIES
+from .parallel_utilities import cancel_operations
+from .job_scheduler import run_job
+from .job_scheduler import cancel_queued_jobs
+from .job_scheduler import RunningCommands
+
+from . import channel_server
 
 # When there is an ImportError, means that Package Control is installed instead of PackagesManager,
 # or vice-versa. Which means we cannot do nothing as this is only compatible with PackagesManager.
@@ -84,6 +99,14 @@ from debug_tools.estimated_time_left import CurrentUpdateProgress
 # Debugger settings: 0 - disabled, 127 - enabled
 log = getLogger( 127, __name__ )
 
+# How many seconds to wait between checking the submodules for changes, and how many seconds
+# without new changes to wait before regenerating the channel files, on the `watch` command.
+WATCH_POLL_INTERVAL = 2
+WATCH_DEBOUNCE_TIME = 5
+
+# The failures of the finished commands were already reported by `print_failed_repositories()`
+g_running_commands = RunningCommands( on_finish=lambda: get_network_policy().pop_failed_repositories() )
+
 #log.setup( "Debug.txt" )
 #log.clear()
 
@@ -93,11 +116,31 @@ log = getLogger( 127, __name__ )
 # log( 2, "PACKAGE_ROOT_DIRECTORY: " + g_settings.PACKAGE_ROOT_DIRECTORY )
 
 
-def main(channel_settings, command="all"):
+def main(channel_settings, command="all", shard_index=0, shard_count=0):
+    """
+        @param shard_index  the shard processed by the command `generate_shard`
+        @param shard_count  how many shards the `.gitmodules` sections are split into, by the
+                            commands `generate_shard` and `merge_shards`
+    """
     global set_progress
     log( 2, "Entering on main(2) %s" % ( str( command ) ) )
 
-    channel_thread = GenerateChannelThread( channel_settings, command )
+    if command == "serve_channel":
+        channel_server.start_server( channel_settings )
+        return
+
+    if command == "stop_serving_channel":
+        channel_server.stop_server()
+        return
+
+    # Terminate the running git processes right away, instead of waiting the running thread to stop
+    if command == "cancel_operation":
+        cancel_queued_jobs()
+        cancel_operations()
+        free_mutex_lock()
+        return
+
+    channel_thread = GenerateChannelThread( channel_settings, command, shard_index, shard_count )
     channel_thread.start()
 
     set_progress = CurrentUpdateProgress( "Generating Repositories files" )
@@ -106,22 +149,29 @@ def main(channel_settings, command="all"):
 
 def unpack_settings(channel_settings):
     global g_channelSettings
+    global g_network_policy
+
     g_channelSettings = channel_settings
+    g_network_policy  = get_network_policy( channel_settings.get( 'CHANNEL_MAXIMUM_PER_HOST', MAXIMUM_PER_HOST ),
+            channel_settings.get( 'CHANNEL_NETWORK_RETRIES', MAXIMUM_RETRIES ) )
 
     # log( 1, "g_channelSettings: \n\n" + dictionary_to_string_by_line( g_channelSettings ) )
 
 
 class GenerateChannelThread(threading.Thread):
 
-    def __init__(self, channel_settings, command="all"):
+    def __init__(self, channel_settings, command="all", shard_index=0, shard_count=0):
         threading.Thread.__init__(self)
         self.command          = command
         self.channel_settings = channel_settings
 
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
     def run(self):
         log( 2, "Entering on run(1)" )
 
-        with lock_context_manager() as is_allowed:
+        with g_running_commands.lock_context_manager( self.command ) as is_allowed:
             if not is_allowed: return
             global g_failed_repositories
 
@@ -154,12 +204,13 @@ class GenerateChannelThread(threading.Thread):
 
             elif self.command == "git_tag_all":
                 index = 0
+                releases_jobs = []
                 repositories_count = len( last_channel_file )
 
                 for package_name, pi in sequence_timer( last_channel_file, info_frequency=0 ):
                     index += 1
 
-                    if not g_is_already_running:
+                    if not g_running_commands.is_running:
                         raise RuntimeError( "Stopping the process as this Python module was reloaded!" )
 
                     # # For quick testing
@@ -171,13 +222,25 @@ class GenerateChannelThread(threading.Thread):
                     log( 1, "{:s} Processing {:3d} of {:d} repositories... {:s}".format( progress, index, repositories_count, package_name ) )
 
                     last_dictionary = last_channel_file.get( package_name, {} )
-                    update_repository( last_dictionary, package_name )
+                    add_release_job( releases_jobs, update_repository( last_dictionary, package_name ) )
 
+                ReleasesArchiver( g_channelSettings ).process( releases_jobs )
                 repositories, dependencies = split_repositories_and_depencies( last_channel_file )
                 self.save_log_file( repositories, dependencies )
 
-            elif self.command == "cancel_operation":
-                free_mutex_lock()
+            elif self.command == "generate_shard":
+                create_shard_file( all_packages, last_channel_file, self.shard_index, self.shard_count )
+                print_failed_repositories()
+
+            elif self.command == "merge_shards":
+                channel_packages = merge_shards_files( self.shard_count )
+
+                if channel_packages:
+                    repositories, dependencies = split_repositories_and_depencies( channel_packages )
+                    self.save_log_file( repositories, dependencies )
+
+            elif self.command == "watch":
+                watch_repositories( all_packages )
 
             else:
                 log( 1, "Invalid command: " + str( self.command ) )
@@ -193,12 +256,10 @@ class GenerateChannelThread(threading.Thread):
         print_failed_repositories()
 
         sublime.active_window().run_command( "show_panel", {"panel": "console", "toggle": False} )
-        free_mutex_lock()
 
     def on_done(self, picked_index):
 
         if picked_index < 0:
-            free_mutex_lock()
             return
 
         if picked_index == 0:
@@ -213,7 +274,6 @@ class GenerateChannelThread(threading.Thread):
                 def on_done_severity(picked_index):
 
                     if picked_index < 0 or picked_index == 1:
-                        free_mutex_lock()
                         return
 
                     elif picked_index == 0:
@@ -240,7 +300,6 @@ class GenerateChannelThread(threading.Thread):
                             thread.start()
 
                         def on_cancel():
-                            free_mutex_lock()
                             restore_last_actived_panel()
                             can_continue[0] = True
                             return
@@ -316,7 +375,18 @@ class GenerateChannelThread(threading.Thread):
         return self.last_picked_item - self.last_excluded_items
 
     def on_done_async(self):
+        """
+            The command `git_tag` only runs after the repositories are picked, then it is queued
+            again, as the running commands can conflict with it.
+        """
+
+        with g_running_commands.lock_context_manager( "git_tag" ) as is_allowed:
+            if not is_allowed: return
+            self.update_picked_repositories()
+
+    def update_picked_repositories(self):
         save_items = False
+        releases_jobs = []
         log.newline()
 
         for package_index, pi in sequence_timer( range( 1, self.last_picked_item + 1 ), info_frequency=0 ):
@@ -335,10 +405,11 @@ class GenerateChannelThread(threading.Thread):
             save_items      = True
             last_dictionary = self.last_channel_file.get( package_name, {} )
 
-            update_repository( last_dictionary, package_name, self.severity_level )
+            add_release_job( releases_jobs, update_repository( last_dictionary, package_name, self.severity_level ) )
             log.newline()
 
         if save_items:
+            ReleasesArchiver( g_channelSettings ).process( releases_jobs )
             repositories, dependencies = split_repositories_and_depencies( self.last_channel_file )
             self.save_log_file( repositories, dependencies )
 
@@ -360,9 +431,18 @@ def split_repositories_and_depencies(repositories_dictionary):
     return sort_list_of_dictionaries( packages_list), sort_list_of_dictionaries( dependencies_list )
 
 
+def add_release_job(releases_jobs, release_job):
+
+    if release_job:
+        releases_jobs.append( release_job )
+
+
 def update_repository(last_dictionary, package_name, severity_level=3):
     """
         @param severity_level see the function get_last_tag_fixed() for the severity leves available
+
+        @return a release job for `ReleasesArchiver.process()` or `None` when the release is a
+                tagged branch, which has no checksum.
     """
     log( 1, "Updating repository... %s" % ( str( package_name ) ) )
 
@@ -377,16 +457,45 @@ def update_repository(last_dictionary, package_name, severity_level=3):
 
     # Only push the new tag, if it is not created yet.
     if release_data['git_tag'] != git_tag:
-        command = "git push origin %s" % git_tag
-        command_line_interface.execute( shlex.split( command ), absolute_path, live_output=True, short_errors=True )
+        run_network_command( "git push origin %s" % git_tag, absolute_path )
 
     # Check this to do not erase the tagged branch
     if 'is_branched_tag' not in release_data:
-        release_data['url'] = release_data['url'].replace( release_data['git_tag'], git_tag )
+
+        # The last tag checksum and artifact URL are only set again when the new tag is archived
+        release_data.pop( 'sha256', None )
+        release_data.pop( 'size', None )
+
+        if 'homepage' in last_dictionary:
+            release_data['url'] = get_download_url( last_dictionary['homepage'], git_tag )
+
+        else:
+            release_data['url'] = release_data['url'].replace( release_data['git_tag'], git_tag )
 
         if release_data['git_tag'] != git_tag:
             release_data['git_tag'] = git_tag
 
+        return package_name, absolute_path, git_tag, release_data
+
+    return None
+
+
+def run_network_command(command, absolute_path):
+    """
+        Run a git `command` which accesses the remote with the `g_network_policy`, which retries it
+        on the network errors, and add the repository to the failed ones when it still fails.
+
+        @return the command output or False, as `cmd.Cli.execute()`
+    """
+    result = g_network_policy.run( shlex.split( command ), absolute_path )
+    log.clean( 1, result.output )
+
+    if result.returncode != 0:
+        g_failed_repositories.append( (command, absolute_path) )
+        return False
+
+    return result.output
+
 
 def print_failed_repositories():
 
@@ -398,38 +507,11 @@ def print_failed_repositories():
         log( 1, "Command: %s (%s)" % ( command, repository ) )
 
 
-@contextlib.contextmanager
-def lock_context_manager():
-    """
-        https://stackoverflow.com/questions/12594148/skipping-execution-of-with-block
-        https://stackoverflow.com/questions/27071524/python-context-manager-not-cleaning-up
-        https://stackoverflow.com/questions/10447818/python-context-manager-conditionally-executing-body
-        https://stackoverflow.com/questions/34775099/why-does-contextmanager-throws-a-runtime-error-generator-didnt-stop-after-thro
-    """
-    try:
-        yield is_allowed_to_run()
-
-    finally:
-        free_mutex_lock()
-
-
 def free_mutex_lock():
-    global g_is_already_running
-    g_is_already_running = False
-
-
-def is_allowed_to_run():
     """
-        Returns `True` when it is allowed to run the channel manager, `False` otherwise.
+        Stop all the running commands, as the cancel command does.
     """
-    global g_is_already_running
-
-    if g_is_already_running:
-        print( "You are already running a command. Wait until it finishes or restart Sublime Text" )
-        return False
-
-    g_is_already_running = True
-    return True
+    g_running_commands.stop()
 
 
 def load_deafault_channel():
@@ -478,26 +560,41 @@ def create_channel_file(repositories, dependencies):
     write_data_file( g_channelSettings['CHANNEL_FILE_PATH'], channel_dictionary )
 
 
-def create_repositories_list(all_packages, last_channel_file):
-    gitFilePath    = os.path.join( g_channelSettings['CHANNEL_ROOT_DIRECTORY'], '.gitmodules' )
+def get_gitmodules_path():
+    return os.path.join( g_channelSettings['CHANNEL_ROOT_DIRECTORY'], '.gitmodules' )
+
+
+def load_git_repositories():
+    gitFilePath    = get_gitmodules_path()
     gitModulesFile = configparser.RawConfigParser()
 
+    gitModulesFile.read( gitFilePath )
+    log( 1, "gitModulesFile: %s", gitFilePath )
+
+    return get_git_repositories( gitModulesFile )
+
+
+def create_repositories_list(all_packages, last_channel_file, gitRepositories=None):
+    """
+        @param gitRepositories   the list of `Repository` to process, defaults to all the
+                                 repositories on the `.gitmodules` file.
+    """
     repositories = []
     dependencies = []
 
-    gitModulesFile.read( gitFilePath )
-    command_line_interface = cmd.Cli( None, False )
+    if gitRepositories is None:
+        gitRepositories = load_git_repositories()
 
-    gitRepositories = get_git_repositories( gitModulesFile )
+    command_line_interface = cmd.Cli( None, False )
     sections_count  = len( gitRepositories )
 
     index = 0
-    log( 1, "gitModulesFile: %s", gitFilePath )
+    releases_jobs = []
     log( 1, "Total repositories to parse: " + str( sections_count ) )
 
     for repository, pi in sequence_timer( gitRepositories, info_frequency=0 ):
 
-        if not g_is_already_running:
+        if not g_running_commands.is_running:
             raise RuntimeError( "Stopping the process as this Python module was reloaded!" )
 
         # # For quick testing
@@ -509,38 +606,236 @@ def create_repositories_list(all_packages, last_channel_file):
         progress = progress_info( pi, set_progress )
         log( 1, "{:s} Processing {:3d} of {:d} repositories... {:s}".format( progress, index, sections_count, repository.path ) )
 
-        if repository.name in all_packages:
-            repository.info = all_packages[repository.name]
+        process_repository( repository, all_packages, last_channel_file, command_line_interface, repositories, dependencies )
 
-        else:
-            repository.info['details'] = repository.url
+        for release_data, git_tag in repository.releases_tags:
+            releases_jobs.append( ( repository.name, repository.absolute_path, git_tag, release_data ) )
 
-        repository.release_data['platforms']    = "*"
-        repository.release_data['sublime_text'] = ">=4000"
+    ReleasesArchiver( g_channelSettings ).process( releases_jobs )
+    return sort_list_of_dictionaries( repositories ), sort_list_of_dictionaries( dependencies )
 
-        # Must to be called after setting `release_data{}`
-        repository.setVersioningTag( last_channel_file, command_line_interface )
-        fix_sublime_text_release( repository, repositories, dependencies )
 
-        user_forker = get_user_name( repository.url )
-        repository.ensureAuthorName( user_forker )
+def process_repository(repository, all_packages, last_channel_file, command_line_interface, repositories, dependencies):
+    """
+        Fill the `repository.info` with the package data and add it to the `repositories` or the
+        `dependencies` list.
+    """
 
-        repository.release_data['python_versions'] = ['3.3']
-        python_version = repository.absolute_path + '/.python-version'
+    # Copy it because the `watch` command can process the same repository several times
+    if repository.name in all_packages:
+        repository.info = copy.deepcopy( all_packages[repository.name] )
 
-        if os.path.exists(python_version):
-            with open(python_version, 'r') as file:
-                repository.release_data['python_versions'] = [file.read().strip()]
+    else:
+        repository.info['details'] = repository.url
 
-        # Must to be called after `setVersioningTag()`
-        tagged_releases = repository.getOldCompatibleVersions( command_line_interface )
-        tagged_releases.insert( 0, repository.release_data )
-        tagged_releases = sort_dictionaries_on_list( tagged_releases )
+    repository.release_data['platforms']    = "*"
+    repository.release_data['sublime_text'] = ">=4000"
 
-        repository.info['name']     = repository.name
-        repository.info['releases'] = tagged_releases
+    # Must to be called after setting `release_data{}`
+    repository.setVersioningTag( last_channel_file, command_line_interface )
+    fix_sublime_text_release( repository, repositories, dependencies )
 
-    return sort_list_of_dictionaries( repositories ), sort_list_of_dictionaries( dependencies )
+    user_forker = get_user_name( repository.url )
+    repository.ensureAuthorName( user_forker )
+
+    repository.release_data['python_versions'] = ['3.3']
+    python_version = repository.absolute_path + '/.python-version'
+
+    if os.path.exists(python_version):
+        with open(python_version, 'r') as file:
+            repository.release_data['python_versions'] = [file.read().strip()]
+
+    # Must to be called after `setVersioningTag()`
+    tagged_releases = repository.getOldCompatibleVersions( command_line_interface )
+    tagged_releases.insert( 0, repository.release_data )
+    tagged_releases = sort_dictionaries_on_list( tagged_releases )
+
+    repository.info['name']     = repository.name
+    repository.info['releases'] = tagged_releases
+
+
+def get_shards_directory():
+    return os.path.join( os.path.dirname( g_channelSettings['CHANNEL_REPOSITORY_FILE'] ), "shards" )
+
+
+def get_shard_file(shard_index, shard_count):
+    return os.path.join( get_shards_directory(), "repository-%d-of-%d.json" % ( shard_index, shard_count ) )
+
+
+def get_section_shard(section, shard_count):
+    """
+        Hash the section name instead of using its position, so adding or removing some
+        `.gitmodules` section does not move the other sections to another shard.
+    """
+    return zlib.crc32( section.encode( 'utf-8' ) ) % shard_count
+
+
+def create_shard_file(all_packages, last_channel_file, shard_index, shard_count):
+    """
+        Process only the `.gitmodules` sections of the shard `shard_index` and save their entries
+        on a fragment file, to be merged by `merge_shards_files()`. Each shard can be processed by a
+        separate Sublime Text instance or computer sharing the same data folder.
+    """
+
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        log( 1, "Error: Invalid shard %s of %s", shard_index, shard_count )
+        return
+
+    git_repositories = [ repository for repository in load_git_repositories()
+            if get_section_shard( repository.section, shard_count ) == shard_index ]
+
+    log( 1, "Processing the shard %d of %d with %d repositories...", shard_index, shard_count, len( git_repositories ) )
+    repositories, dependencies = create_repositories_list( all_packages, last_channel_file, git_repositories )
+
+    shard_file = OrderedDict()
+    shard_file['shard_index'] = shard_index
+    shard_file['shard_count'] = shard_count
+    shard_file['packages']    = OrderedDict( ( info['name'], info ) for info in repositories + dependencies )
+
+    shards_directory = get_shards_directory()
+
+    if not os.path.isdir( shards_directory ):
+        os.makedirs( shards_directory )
+
+    write_data_file( get_shard_file( shard_index, shard_count ), shard_file )
+    log( 1, "Saved the shard file: %s", get_shard_file( shard_index, shard_count ) )
+
+
+def merge_shards_files(shard_count=0):
+    """
+        @param shard_count   how many shard files to merge, or `0` to find it from the existing files
+        @return a dictionary with all the packages entries, or `None` when some shard file is missing
+    """
+
+    if shard_count < 1:
+        shards_counts = set( re.search( r'-of-(\d+)\.json$', shard_file ).group( 1 )
+                for shard_file in glob.glob( os.path.join( get_shards_directory(), "repository-*-of-*.json" ) ) )
+
+        if len( shards_counts ) != 1:
+            log( 1, "Error: Could not find which shards to merge, found the shards counts: %s", shards_counts )
+            return None
+
+        shard_count = int( shards_counts.pop() )
+
+    channel_packages = OrderedDict()
+
+    for shard_index in range( shard_count ):
+        shard_file = get_shard_file( shard_index, shard_count )
+
+        if not os.path.exists( shard_file ):
+            log( 1, "Error: The shard file is missing: %s", shard_file )
+            return None
+
+        channel_packages.update( load_data_file( shard_file ).get( 'packages', {} ) )
+
+    log( 1, "Merged %d packages from %d shards.", len( channel_packages ), shard_count )
+    return channel_packages
+
+
+def get_repository_state(absolute_path):
+    """
+        Returns a tuple with the modified times of the files which affect the repository entry on
+        the channel files, i.e., its git references and settings files.
+    """
+    git_directory = get_git_directory( absolute_path )
+    modified_times = []
+
+    for file_path in (
+                os.path.join( git_directory, "HEAD" ),
+                os.path.join( git_directory, "packed-refs" ),
+                os.path.join( absolute_path, "settings.json" ),
+                os.path.join( absolute_path, ".sublime-dependency" ),
+                os.path.join( absolute_path, ".python-version" ),
+            ):
+        modified_times.append( get_modified_time( file_path ) )
+
+    for references in ( "heads", "tags" ):
+
+        # The directories modified times change when some reference is created or deleted
+        for root, directories, files in os.walk( os.path.join( git_directory, "refs", references ) ):
+            modified_times.append( get_modified_time( root ) )
+
+            for file in sorted( files ):
+                modified_times.append( get_modified_time( os.path.join( root, file ) ) )
+
+    return tuple( modified_times )
+
+
+def watch_repositories(all_packages):
+    """
+        Keep regenerating the channel files entries of the repositories which had their references
+        changed, until the command `cancel_operation` is called. When the `.gitmodules` file is
+        changed, all the entries are regenerated.
+
+        The channel files are only held while regenerating them, then the other commands can run
+        while it is waiting for changes.
+    """
+    gitFilePath = get_gitmodules_path()
+
+    while g_running_commands.is_running:
+
+        with run_job( "watch_regeneration" ) as is_allowed:
+            if not is_allowed: return
+
+            # Other commands could have changed the channel files since it was loaded
+            last_channel_file = load_repository_file( g_channelSettings['CHANNEL_REPOSITORY_FILE'] )
+            gitmodules_state = get_modified_time( gitFilePath )
+            git_repositories = load_git_repositories()
+
+            repositories, dependencies = create_repositories_list( all_packages, last_channel_file, git_repositories )
+            create_channel_file( repositories, dependencies )
+            create_repository_file( repositories, dependencies )
+
+            channel_packages = OrderedDict( ( info['name'], info ) for info in repositories + dependencies )
+            repositories_states = { repository.name: get_repository_state( repository.absolute_path ) for repository in git_repositories }
+
+        changed_repositories = {}
+        last_change_time = 0
+
+        log.newline()
+        log( 1, "Watching %d repositories for changes...", len( git_repositories ) )
+
+        while g_running_commands.is_running:
+            time.sleep( WATCH_POLL_INTERVAL )
+
+            if get_modified_time( gitFilePath ) != gitmodules_state:
+                log( 1, "The `.gitmodules` file changed, regenerating all the repositories..." )
+                break
+
+            for repository in git_repositories:
+                repository_state = get_repository_state( repository.absolute_path )
+
+                if repository_state != repositories_states[repository.name]:
+                    repositories_states[repository.name] = repository_state
+                    changed_repositories[repository.name] = repository
+                    last_change_time = time.time()
+
+            # Wait the bursts of changes as `git tag` followed by `git push` to settle down
+            if changed_repositories and time.time() - last_change_time >= WATCH_DEBOUNCE_TIME:
+                log( 1, "Regenerating the changed repositories: %s", list( changed_repositories.keys() ) )
+
+                # A new `Repository` object is required because it holds the last processed data
+                changed_list = [ Repository( repository.gitModulesFile, repository.section )
+                        for repository in changed_repositories.values() ]
+
+                with run_job( "watch_regeneration" ) as is_allowed:
+                    if not is_allowed: return
+
+                    # Keep the changes written by the other commands while watching
+                    last_channel_file = load_repository_file( g_channelSettings['CHANNEL_REPOSITORY_FILE'] )
+                    channel_packages.update( last_channel_file )
+
+                    repositories, dependencies = create_repositories_list( all_packages, last_channel_file, changed_list )
+
+                    for info in repositories + dependencies:
+                        channel_packages[info['name']] = info
+
+                    repositories, dependencies = split_repositories_and_depencies( channel_packages )
+                    create_channel_file( repositories, dependencies )
+                    create_repository_file( repositories, dependencies )
+
+                changed_repositories = {}
+                print_failed_repositories()
 
 
 def get_last_tag_fixed(absolute_path, last_dictionary, command_line_interface, force_tag_update=False, severity_level=1):
@@ -633,12 +928,7 @@ def delete_tags_list(absolute_path, tags_list, command_line_interface):
             short_errors=True
         )
 
-        command_line_interface.execute(
-            shlex.split( "git push origin :refs/tags/%s" % ( tag ) ),
-            absolute_path,
-            live_output=True,
-            short_errors=True
-        )
+        run_network_command( "git push origin :refs/tags/%s" % ( tag ), absolute_path )
 
 
 def get_current_commit_tags(absolute_path, command_line_interface):
@@ -945,8 +1235,7 @@ def create_packages_manager_tag(absolute_path, command_line_interface):
         command_line_interface.execute( shlex.split( command ), absolute_path, live_output=True, short_errors=True )
 
         # https://stackoverflow.com/questions/14031970/git-push-current-branch-shortcut
-        command = "git push origin HEAD"
-        command_line_interface.execute( shlex.split( command ), absolute_path, live_output=True, short_errors=True )
+        run_network_command( "git push origin HEAD", absolute_path )
 
 
 def create_git_tag(absolute_path, new_tag_name, command_line_interface):
@@ -1054,6 +1343,9 @@ class Repository():
         self.info         = OrderedDict()
         self.release_data = OrderedDict()
 
+        # the list of `(release_data, git_tag)` which can have their archives checksums computed
+        self.releases_tags = []
+
         # relative path the the repository
         self.path = os.path.normpath( gitModulesFile.get( section, "path" ) )
         self.name = os.path.basename( self.path )
@@ -1120,6 +1412,7 @@ class Repository():
         else:
             self.release_data['git_tag'] = git_tag
             self.release_data['version'] = date_tag
+            self.releases_tags.append( ( self.release_data, git_tag ) )
 
         self.release_data['date'] = release_date
 
@@ -1209,6 +1502,7 @@ class Repository():
                 release_data['version'] = get_git_version( tag_date )
 
                 tagged_releases.append( release_data )
+                self.releases_tags.append( ( release_data, tag ) )
 
         return tagged_releases
 
@@ -29,10 +29,36 @@
 
 import os
 import sys
+import json
+import time
+import shutil
+import tempfile
 import unittest
+import threading
+
+from http.server import HTTPServer
+from http.server import BaseHTTPRequestHandler
 
 from .channel_manager import fix_semantic_version
 from .channel_manager import increment_patch_version
+from .channel_server import parse_byte_range
+from .channel_server import is_gzip_accepted
+from .parallel_utilities import get_rate_limit_delay
+from .parallel_utilities import DurationDatabase
+from .parallel_utilities import ParallelProgress
+from .parallel_utilities import run_process
+from .parallel_utilities import TokenBucket
+from .parallel_utilities import ProcessResult
+from .parallel_utilities import cancel_operations
+from .parallel_utilities import start_cancellable_operation
+from .parallel_utilities import finish_cancellable_operation
+from .git_utilities import parse_git_config_value
+from .git_utilities import get_url_host
+from .git_utilities import is_transient_error
+from .git_utilities import NetworkPolicy
+from .forks_finder import ApiCache
+from .forks_finder import ForksFinder
+from .job_scheduler import JobScheduler
 
 from debug_tools import getLogger
 
@@ -110,6 +136,244 @@ class ChannelManagerUnitTests(unittest.TestCase):
         self.fix_semantic_version( "v1.6.0", "1.6.0", "1.6.0" )
         self.fix_semantic_version( "v1.6.1", "1.6.1", "1.6.1" )
 
+    def test_parse_byte_range(self):
+        self.assertEqual( parse_byte_range( "bytes=0-9", 100 ), (0, 9) )
+        self.assertEqual( parse_byte_range( "bytes=90-", 100 ), (90, 99) )
+        self.assertEqual( parse_byte_range( "bytes=-10", 100 ), (90, 99) )
+        self.assertEqual( parse_byte_range( "bytes=50-500", 100 ), (50, 99) )
+
+        self.assertEqual( parse_byte_range( "bytes=0-1,5-6", 100 ), None )
+        self.assertRaises( ValueError, parse_byte_range, "bytes=100-", 100 )
+        self.assertRaises( ValueError, parse_byte_range, "bytes=9-1", 100 )
+
+    def test_is_gzip_accepted(self):
+        self.assertTrue( is_gzip_accepted( "gzip, deflate" ) )
+        self.assertTrue( is_gzip_accepted( "deflate, GZIP;q=0.5" ) )
+        self.assertTrue( is_gzip_accepted( "*" ) )
+
+        self.assertFalse( is_gzip_accepted( "" ) )
+        self.assertFalse( is_gzip_accepted( "identity" ) )
+        self.assertFalse( is_gzip_accepted( "gzip;q=0" ) )
+        self.assertFalse( is_gzip_accepted( "gzip;q=0.000, *" ) )
+
+    def test_get_rate_limit_delay(self):
+        self.assertEqual( get_rate_limit_delay( False ), 0 )
+        self.assertEqual( get_rate_limit_delay( "Already up to date." ), 0 )
+        self.assertEqual( get_rate_limit_delay( "HTTP 429\nRetry-After: 30" ), 30 )
+        self.assertEqual( get_rate_limit_delay( "API rate limit exceeded for user" ), 60 )
+
+    def test_duration_database(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            durations_file = os.path.join( directory, "durations.json" )
+            self.assertEqual( DurationDatabase( durations_file, "pull" ).get_expected( "Packages/A" ), 0 )
+
+            durations = DurationDatabase( durations_file, "pull" )
+            durations.add( "Packages/A", 10 )
+            durations.add( "Packages/B", 2 )
+            durations.add( "Packages/A", 20 )
+            durations.save()
+
+            # Other commands durations are kept apart
+            other_durations = DurationDatabase( durations_file, "fetch" )
+            other_durations.add( "Packages/A", 1 )
+            other_durations.save()
+
+            durations = DurationDatabase( durations_file, "pull" )
+            self.assertEqual( durations.get_expected( "Packages/A" ), 15 )
+            self.assertEqual( durations.get_expected( "Packages/C" ), 8.5 )
+            self.assertEqual( DurationDatabase( durations_file, "fetch" ).get_expected( "Packages/A" ), 1 )
+
+        finally:
+            shutil.rmtree( directory )
+
+    def test_parallel_progress(self):
+        progress = ParallelProgress( 3, 40 )
+        progress.start_time -= 10
+
+        # The slowest item finished first, then the remaining ones are expected to be faster
+        self.assertTrue( progress.finish( 30 ).endswith( "remaining 0:00:03" ) )
+
+        progress = ParallelProgress( 3 )
+        progress.start_time -= 10
+        self.assertTrue( progress.finish().endswith( "remaining 0:00:20" ) )
+
+    def test_cancel_operations(self):
+        results = {}
+        command = [ sys.executable, "-c", "print( 'ran' )" ]
+
+        def run_operation(name, started, cancelled):
+            start_cancellable_operation()
+
+            try:
+                started.set()
+                cancelled.wait( 5 )
+                results[name] = run_process( command, "." ).returncode
+
+            finally:
+                finish_cancellable_operation()
+
+        cancelled = threading.Event()
+        running   = threading.Event()
+        thread    = threading.Thread( target=run_operation, args=( "cancelled", running, cancelled ) )
+
+        thread.start()
+        self.assertTrue( running.wait( 5 ) )
+
+        cancel_operations()
+        cancelled.set()
+
+        # Started after the cancel while the cancelled operation is still running
+        later_thread = threading.Thread( target=run_operation, args=( "later", threading.Event(), cancelled ) )
+        later_thread.start()
+
+        thread.join()
+        later_thread.join()
+
+        self.assertEqual( results, { "cancelled": -1, "later": 0 } )
+        self.assertEqual( run_process( command, "." ).returncode, 0 )
+
+    def test_parse_git_config_value(self):
+        self.assertEqual( parse_git_config_value( "https://github.com/user/repo.git" ), "https://github.com/user/repo.git" )
+        self.assertEqual( parse_git_config_value( '"with # hash" ; comment' ), "with # hash" )
+        self.assertEqual( parse_git_config_value( "value # comment" ), "value" )
+        self.assertEqual( parse_git_config_value( "tab\\there" ), "tab\there" )
+
+    def test_get_url_host(self):
+        self.assertEqual( get_url_host( "https://GitHub.com/user/repo.git" ), "github.com" )
+        self.assertEqual( get_url_host( "git@gitlab.com:user/repo.git" ), "gitlab.com" )
+        self.assertEqual( get_url_host( "ssh://git@example.com:2222/repo" ), "example.com" )
+        self.assertEqual( get_url_host( "/home/user/repo" ), "" )
+        self.assertEqual( get_url_host( "file:///home/user/repo" ), "" )
+
+    def test_is_transient_error(self):
+        self.assertTrue( is_transient_error( "fatal: unable to access 'x': Could not resolve host: github.com" ) )
+        self.assertTrue( is_transient_error( "error: RPC failed; curl 56 GnuTLS recv error (-54)" ) )
+        self.assertTrue( is_transient_error( "fatal: unable to access 'x': The requested URL returned error: 502" ) )
+        self.assertFalse( is_transient_error( "fatal: repository 'x' not found" ) )
+        self.assertFalse( is_transient_error( "! [rejected] master -> master (non-fast-forward)" ) )
+
+    def test_network_policy_rate_limit(self):
+        results = [ ProcessResult( 128, "remote: API rate limit exceeded, Retry-After: 1", 0 ), ProcessResult( 0, "", 0 ) ]
+        arguments = []
+
+        def runner(*args):
+            arguments.append( args )
+            return results.pop( 0 )
+
+        policy       = NetworkPolicy( maximum_retries=1, runner=runner )
+        rate_limiter = TokenBucket( 1000, 10 )
+        command      = [ "git", "fetch", "https://github.com/user/repo.git" ]
+
+        # The rate limit message is not a transient error, but it is retried after the rate limiter wait
+        start_time = time.time()
+        result     = policy.run( command, "missing_directory", rate_limiter=rate_limiter )
+
+        self.assertEqual( result.returncode, 0 )
+        self.assertEqual( len( arguments ), 2 )
+        self.assertFalse( policy.failed_repositories )
+        self.assertGreaterEqual( time.time() - start_time, 0.9 )
+
+    def test_forks_finder_cache(self):
+        requests = []
+
+        class ForksHandler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                page = 2 if "page=2" in self.path else 1
+                etag = '"page%d"' % page
+                requests.append( ( page, self.headers.get( 'If-None-Match' ) ) )
+
+                if self.headers.get( 'If-None-Match' ) == etag:
+                    self.send_response( 304 )
+                    self.end_headers()
+                    return
+
+                body = json.dumps( [ { "owner": { "login": "user%d" % page },
+                        "clone_url": "https://github.com/user%d/repo.git" % page } ] ).encode( 'utf-8' )
+
+                self.send_response( 200 )
+                self.send_header( 'ETag', etag )
+                self.send_header( 'Content-Length', str( len( body ) ) )
+
+                if page == 1:
+                    self.send_header( 'Link', '<http://127.0.0.1:%d/repos/user/repo/forks?page=2>; rel="next"'
+                            % self.server.server_address[1] )
+
+                self.end_headers()
+                self.wfile.write( body )
+
+        server = HTTPServer( ( "127.0.0.1", 0 ), ForksHandler )
+        threading.Thread( target=server.serve_forever ).start()
+
+        try:
+            api_url = "http://127.0.0.1:%d" % server.server_address[1]
+            finder  = ForksFinder( ApiCache( None ), api_url=api_url )
+            forks   = [ ( "user1", "https://github.com/user1/repo.git" ), ( "user2", "https://github.com/user2/repo.git" ) ]
+
+            self.assertEqual( finder.find_forks( "user", "repo.git" ), forks )
+            self.assertEqual( finder.find_forks( "user", "repo" ), forks )
+            self.assertEqual( requests, [ (1, None), (2, None), (1, '"page1"'), (2, '"page2"') ] )
+
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_job_scheduler(self):
+        scheduler = JobScheduler()
+        events = []
+
+        def run(name, shared, exclusive, started, release):
+
+            with scheduler.run_job( name, shared, exclusive ) as is_allowed:
+                events.append( ( name, is_allowed ) )
+                started.set()
+                release.wait( 5 )
+
+        def start(name, shared=(), exclusive=()):
+            started, release = threading.Event(), threading.Event()
+            jobs_count = len( scheduler.get_status() )
+
+            thread = threading.Thread( target=run, args=( name, shared, exclusive, started, release ) )
+            thread.start()
+
+            # Wait it to be queued, so the jobs are queued in order
+            while len( scheduler.get_status() ) == jobs_count:
+                release.wait( 0.01 )
+
+            return thread, started, release
+
+        fetch  = start( "fetch", shared=( "objects", ) )
+        report = start( "report" )
+        self.assertTrue( fetch[1].wait( 5 ) and report[1].wait( 5 ) )
+
+        # The repack conflicts with the fetch, and the pull with the repack queued before it
+        repack = start( "repack", exclusive=( "objects", ) )
+        pull   = start( "pull", shared=( "objects", ) )
+        cancelled = start( "prune", exclusive=( "objects", ) )
+
+        self.assertEqual( [ state for _, state, _ in scheduler.get_status() ],
+                [ "running", "running", "queued", "queued", "queued" ] )
+
+        fetch[2].set()
+        self.assertTrue( repack[1].wait( 5 ) )
+        self.assertFalse( pull[1].is_set() )
+
+        scheduler.cancel_queued()
+        self.assertTrue( pull[1].wait( 5 ) and cancelled[1].wait( 5 ) )
+
+        for thread, _, release in ( report, repack, pull, cancelled ):
+            release.set()
+            thread.join()
+
+        # The cancelled jobs wake up on any order
+        self.assertEqual( events[:3], [ ( "fetch", True ), ( "report", True ), ( "repack", True ) ] )
+        self.assertEqual( sorted( events[3:] ), [ ( "prune", False ), ( "pull", False ) ] )
+
     def fix_semantic_version(self, tag, fix_goal, match_goal):
         fixed, matched = fix_semantic_version(tag)
 
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# These lines allow to use UTF-8 encoding and run this file with `./update.py`, instead of `python update.py`
+# https://stackoverflow.com/questions/7670303/purpose-of-usr-bin-python3
+# https://stackoverflow.com/questions/728891/correct-way-to-define-python-source-code-encoding
+#
+#
+
+#
+# Licensing
+#
+# Channel Manager Server, serve the channel files on the local network
+# Copyright (C) 2017 Evandro Coan <https://github.com/evandrocoan>
+#
+#  This program is free software; you can redistribute it and/or modify it
+#  under the terms of the GNU General Public License as published by the
+#  Free Software Foundation; either version 3 of the License, or ( at
+#  your option ) any later version.
+#
+#  This program is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# To run this file, run on the Sublime Text console:
+# import imp; import channelmanager.all.channel_manager .channel_server; imp.reload( channelmanager.all.channel_manager .channel_server )
+
+import os
+import re
+import gzip
+import argparse
+import mimetypes
+import posixpath
+import threading
+
+from urllib.parse import unquote
+from urllib.parse import urlparse
+
+from socketserver import ThreadingMixIn
+from http.server import HTTPServer
+from http.server import BaseHTTPRequestHandler
+
+
+# Relative imports in Python 3
+# https://stackoverflow.com/questions/16981921/relative-imports-in-python-3
+try:
+    from . import settings as g_settings
+    from .channel_utilities import assert_path
+
+except( ImportError, ValueError ):
+    import settings as g_settings
+    from channel_utilities import assert_path
+
+
+try:
+    import sublime
+
+except( ImportError, ValueError ):
+    sublime = None
+
+    # Import the debugger when running by the command line on the Development version
+    assert_path( os.path.dirname( g_settings.PACKAGE_ROOT_DIRECTORY ), 'debugtools', 'all' )
+
+
+from debug_tools import getLogger
+
+
+# Debugger settings: 0 - disabled, 127 - enabled
+log = getLogger( 127, __name__ )
+
+DEFAULT_SERVER_PORT    = 8000
+DEFAULT_SERVER_ADDRESS = "127.0.0.1"
+DEFAULT_ARTIFACTS_PATH = "/artifacts"
+
+# Files smaller than this are not worth compressing
+MINIMUM_GZIP_SIZE      = 1024
+COPY_CHUNK_SIZE        = 64 * 1024
+COMPRESSIBLE_EXTENSIONS = { ".json", ".txt", ".md", ".gitmodules" }
+
+g_channel_server = None
+
+
+def main():
+    argumentParser = argparse.ArgumentParser( description='Serve the Sublime Text Channel files' )
+
+    argumentParser.add_argument( "-c", "--channel-file", action="store",
+            help="The `channel.json` file to serve." )
+
+    argumentParser.add_argument( "-r", "--repository-file", action="append", default=[],
+            help="A `repository.json` file to serve. It can be passed more than once." )
+
+    argumentParser.add_argument( "-a", "--artifacts-directory", action="store",
+            help="The directory with the `.sublime-package` files built by the channel generation. "
+            "They are served on the path `%s`" % DEFAULT_ARTIFACTS_PATH )
+
+    argumentParser.add_argument( "-b", "--bind", action="store", default=DEFAULT_SERVER_ADDRESS,
+            help="The address to listen on. Use `0.0.0.0` to serve the whole local network." )
+
+    argumentParser.add_argument( "-p", "--port", action="store", type=int, default=DEFAULT_SERVER_PORT,
+            help="The port to listen on." )
+
+    argumentsNamespace = argumentParser.parse_args()
+
+    if not argumentsNamespace.channel_file \
+            and not argumentsNamespace.repository_file \
+            and not argumentsNamespace.artifacts_directory:
+        argumentParser.print_help()
+        return
+
+    routes = ChannelRoutes()
+
+    if argumentsNamespace.channel_file:
+        routes.add_file( argumentsNamespace.channel_file )
+
+    for repository_file in argumentsNamespace.repository_file:
+        routes.add_file( repository_file )
+
+    if argumentsNamespace.artifacts_directory:
+        routes.add_directory( DEFAULT_ARTIFACTS_PATH, argumentsNamespace.artifacts_directory )
+
+    server = ChannelServer( ( argumentsNamespace.bind, argumentsNamespace.port ), routes )
+    log( 1, "Serving the channel files on http://%s:%s/", argumentsNamespace.bind, argumentsNamespace.port )
+
+    try:
+        server.serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        server.server_close()
+
+
+def start_server(channel_settings):
+    """
+        Serve the files `CHANNEL_FILE_PATH`, `CHANNEL_REPOSITORY_FILE` and the built artifacts from
+        `CHANNEL_ARTIFACTS_DIRECTORY` on a background thread.
+    """
+    global g_channel_server
+
+    if g_channel_server:
+        log( 1, "The channel files are already being served on http://%s:%s/", *g_channel_server.server_address[:2] )
+        return g_channel_server
+
+    address = channel_settings.get( 'CHANNEL_SERVER_ADDRESS', DEFAULT_SERVER_ADDRESS )
+    port    = channel_settings.get( 'CHANNEL_SERVER_PORT', DEFAULT_SERVER_PORT )
+
+    routes = ChannelRoutes()
+    routes.add_file( channel_settings['CHANNEL_FILE_PATH'] )
+    routes.add_file( channel_settings['CHANNEL_REPOSITORY_FILE'] )
+
+    artifacts_directory = channel_settings.get( 'CHANNEL_ARTIFACTS_DIRECTORY' )
+
+    if artifacts_directory:
+        artifacts_url = channel_settings.get( 'CHANNEL_ARTIFACTS_URL' )
+        artifacts_path = urlparse( artifacts_url ).path if artifacts_url else DEFAULT_ARTIFACTS_PATH
+        routes.add_directory( artifacts_path or DEFAULT_ARTIFACTS_PATH, artifacts_directory )
+
+    g_channel_server = ChannelServer( ( address, port ), routes )
+
+    server_thread = threading.Thread( target=g_channel_server.serve_forever )
+    server_thread.daemon = True
+    server_thread.start()
+
+    log( 1, "Serving the channel files on http://%s:%s/", address, port )
+    return g_channel_server
+
+
+def stop_server():
+    global g_channel_server
+
+    if g_channel_server:
+        g_channel_server.shutdown()
+        g_channel_server.server_close()
+
+        g_channel_server = None
+        log( 1, "Stopped serving the channel files." )
+
+    else:
+        log( 1, "The channel files are not being served." )
+
+
+def parse_byte_range(range_header, file_size):
+    """
+        Parses a single range `Range: bytes=start-end` header.
+
+        @return (start, end) the inclusive byte positions to send, or `None` when the header must be
+                ignored and the whole file sent, as when it has multiple ranges.
+        @raise ValueError when the range cannot be satisfied
+    """
+    matches = re.match( r'^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$', range_header )
+
+    if not matches:
+        return None
+
+    start, end = matches.group( 1 ), matches.group( 2 )
+
+    if not start and not end:
+        return None
+
+    # `bytes=-500` means the last 500 bytes
+    if not start:
+        suffix_length = int( end )
+
+        if suffix_length == 0:
+            raise ValueError( "Empty suffix range: %s" % range_header )
+
+        return max( 0, file_size - suffix_length ), file_size - 1
+
+    start = int( start )
+    end   = int( end ) if end else file_size - 1
+
+    if start >= file_size or end < start:
+        raise ValueError( "Unsatisfiable range `%s` for %d bytes" % ( range_header, file_size ) )
+
+    return start, min( end, file_size - 1 )
+
+
+def is_gzip_accepted(accept_encoding):
+    """
+        Parses the `Accept-Encoding` header codings and their quality values, where `gzip;q=0`
+        refuses the gzip coding, and an explicit `gzip` coding overrides the `*` wildcard.
+    """
+    qualities = {}
+
+    for coding in accept_encoding.split( "," ):
+        parameters = coding.split( ";" )
+        name = parameters[0].strip().lower()
+
+        if not name:
+            continue
+
+        quality = 1.0
+
+        for parameter in parameters[1:]:
+            key, _, value = parameter.partition( "=" )
+
+            if key.strip().lower() == "q":
+
+                try:
+                    quality = float( value )
+
+                except ValueError:
+                    quality = 0.0
+
+        qualities[name] = quality
+
+    for name in ( "gzip", "x-gzip", "*" ):
+
+        if name in qualities:
+            return qualities[name] > 0
+
+    return False
+
+
+def is_etag_matched(if_none_match, etag):
+    if_none_match = if_none_match.strip()
+
+    if if_none_match == "*":
+        return True
+
+    for candidate in if_none_match.split( "," ):
+        candidate = candidate.strip()
+
+        # The weak comparison is used for `If-None-Match`
+        if candidate.startswith( "W/" ):
+            candidate = candidate[2:]
+
+        if candidate == etag:
+            return True
+
+    return False
+
+
+class ChannelRoutes(object):
+    """
+        Maps the URL paths to the files and directories to be served.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.directories = {}
+
+    def add_file(self, file_path, url_path=None):
+        url_path = url_path or "/" + os.path.basename( file_path )
+        self.files[url_path] = os.path.abspath( file_path )
+
+    def add_directory(self, url_path, directory):
+        self.directories[url_path.rstrip( "/" ) + "/"] = os.path.abspath( directory )
+
+    def resolve(self, url_path):
+        """
+            @return the file system path for the `url_path`, or `None` when it is not served.
+        """
+        url_path = posixpath.normpath( unquote( url_path ) )
+
+        if url_path in self.files:
+            return self.files[url_path]
+
+        for prefix, directory in self.directories.items():
+
+            if url_path.startswith( prefix ):
+                file_path = os.path.abspath( os.path.join( directory, *url_path[len( prefix ):].split( "/" ) ) )
+
+                # Do not allow `..` to escape the served directory
+                if file_path.startswith( directory + os.sep ) and os.path.isfile( file_path ):
+                    return file_path
+
+        return None
+
+
+class ChannelServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, server_address, routes):
+        self.routes = routes
+
+        # Cache the compressed contents by (file_path, modified time, size)
+        self.gzip_cache = {}
+        self.gzip_cache_lock = threading.Lock()
+
+        HTTPServer.__init__( self, server_address, ChannelRequestHandler )
+
+    def get_gzip_contents(self, file_path, file_stat):
+        cache_key = ( file_path, file_stat.st_mtime, file_stat.st_size )
+
+        with self.gzip_cache_lock:
+            contents = self.gzip_cache.get( cache_key )
+
+        if contents is None:
+
+            with open( file_path, "rb" ) as file:
+                contents = gzip.compress( file.read() )
+
+            with self.gzip_cache_lock:
+
+                for old_key in [ key for key in self.gzip_cache if key[0] == file_path ]:
+                    del self.gzip_cache[old_key]
+
+                self.gzip_cache[cache_key] = contents
+
+        return contents
+
+
+class ChannelRequestHandler(BaseHTTPRequestHandler):
+    """
+        Serves the channel files with keep-alive connections, gzip negotiation, `ETag` validation
+        and single byte ranges.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.send_file( send_body=False )
+
+    def do_GET(self):
+        self.send_file( send_body=True )
+
+    def log_message(self, format, *args):
+        log( 2, "%s %s", self.address_string(), format % args )
+
+    def send_empty_response(self, status, headers={}):
+        self.send_response( status )
+
+        for name, value in headers.items():
+            self.send_header( name, value )
+
+        self.send_header( "Content-Length", "0" )
+        self.end_headers()
+
+    def send_file(self, send_body):
+        file_path = self.server.routes.resolve( urlparse( self.path ).path )
+
+        if not file_path or not os.path.isfile( file_path ):
+            self.send_empty_response( 404 )
+            return
+
+        file_stat = os.stat( file_path )
+        file_size = file_stat.st_size
+        etag = '"%x-%x"' % ( int( file_stat.st_mtime * 1000000 ), file_size )
+
+        # The ranges are only served uncompressed, as their positions are of the file contents
+        extension  = os.path.splitext( file_path )[1].lower()
+        is_gzipped = extension in COMPRESSIBLE_EXTENSIONS and file_size >= MINIMUM_GZIP_SIZE \
+                and not self.headers.get( "Range" ) and is_gzip_accepted( self.headers.get( "Accept-Encoding", "" ) )
+
+        if is_gzipped:
+            etag = etag[:-1] + '-gzip"'
+
+        common_headers = \
+        {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Last-Modified": self.date_time_string( file_stat.st_mtime ),
+        }
+
+        if is_etag_matched( self.headers.get( "If-None-Match", "" ), etag ):
+            self.send_empty_response( 304, common_headers )
+            return
+
+        if is_gzipped:
+            contents = self.server.get_gzip_contents( file_path, file_stat )
+            self.send_response( 200 )
+            self.send_headers( file_path, common_headers, len( contents ) )
+            self.send_header( "Content-Encoding", "gzip" )
+            self.end_headers()
+
+            if send_body:
+                self.wfile.write( contents )
+
+            return
+
+        byte_range = None
+        range_header = self.headers.get( "Range" )
+
+        if range_header and is_etag_matched( self.headers.get( "If-Range", etag ), etag ):
+
+            try:
+                byte_range = parse_byte_range( range_header, file_size )
+
+            except ValueError:
+                common_headers["Content-Range"] = "bytes */%d" % file_size
+                self.send_empty_response( 416, common_headers )
+                return
+
+        if byte_range:
+            start, end = byte_range
+            self.send_response( 206 )
+            self.send_header( "Content-Range", "bytes %d-%d/%d" % ( start, end, file_size ) )
+
+        else:
+            start, end = 0, file_size - 1
+            self.send_response( 200 )
+
+        self.send_headers( file_path, common_headers, end - start + 1 )
+        self.send_header( "Accept-Ranges", "bytes" )
+        self.end_headers()
+
+        if send_body:
+            self.copy_file_range( file_path, start, end - start + 1 )
+
+    def send_headers(self, file_path, common_headers, content_length):
+        content_type = mimetypes.guess_type( file_path )[0] or "application/octet-stream"
+
+        if file_path.endswith( ".sublime-package" ):
+            content_type = "application/zip"
+
+        for name, value in common_headers.items():
+            self.send_header( name, value )
+
+        self.send_header( "Content-Type", content_type )
+        self.send_header( "Content-Length", str( content_length ) )
+
+    def copy_file_range(self, file_path, start, length):
+
+        with open( file_path, "rb" ) as file:
+            file.seek( start )
+
+            while length > 0:
+                chunk = file.read( min( COPY_CHUNK_SIZE, length ) )
+
+                if not chunk:
+                    break
+
+                length -= len( chunk )
+                self.wfile.write( chunk )
+
+
+if __name__ == "__main__":
+    main()
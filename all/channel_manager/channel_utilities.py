@@ -27,9 +27,11 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import io
 import os
 import sys
 import time
+import subprocess
 
 from distutils.version import LooseVersion
 
@@ -194,6 +196,51 @@ def download_text_file( git_modules_url ):
     return downloaded_contents.decode('utf-8')
 
 
+def get_git_directory(repository_path):
+    """
+        Returns the git directory of the repository, following the `gitdir: path` indirection of the
+        `.git` file created for the git submodules.
+    """
+    git_path = os.path.join( repository_path, ".git" )
+
+    if os.path.isfile( git_path ):
+
+        with io.open( git_path, "r", encoding='utf-8' ) as file:
+
+            for line in file:
+
+                if line.startswith( "gitdir:" ):
+                    git_directory = line[len( "gitdir:" ):].strip()
+                    return os.path.normpath( os.path.join( repository_path, git_directory ) )
+
+    return git_path
+
+
+def get_startup_info():
+    """
+        Hide the console window which would be opened for each git process on Windows.
+    """
+
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        return startupinfo
+
+    return None
+
+
+def get_modified_time(file_path):
+    """
+        Returns the file modified time or `0` when it does not exist.
+    """
+
+    try:
+        return os.path.getmtime( file_path )
+
+    except OSError:
+        return 0
+
+
 def get_main_directory(current_directory):
     possible_main_directory = os.path.normpath( os.path.dirname( os.path.dirname( current_directory ) ) )
 
@@ -41,6 +41,8 @@ import contextlib
 
 from . import settings as g_settings
 from .channel_utilities import is_sublime_text_upgraded
+from .git_utilities import get_git_remotes
+from .job_scheduler import run_job
 
 try:
     from PackagesManager.package_control import cmd
@@ -62,7 +64,6 @@ log = getLogger( 127, __name__ )
 # log( 2, "Debugging" )
 # log( 2, "PACKAGE_ROOT_DIRECTORY: " + g_settings.PACKAGE_ROOT_DIRECTORY )
 packages_upstream_name = "Default.sublime-package"
-g_is_already_running = False
 MAXIMUM_COMMITS_TO_SEARCH = 10
 
 
@@ -101,7 +102,6 @@ class CopyFilesThread(threading.Thread):
             create_git_ignore_file( upstream_directory )
 
             create_version_setting_file( upstream_directory )
-            free_mutex_lock()
 
 
 def run_command(command, upstream_directory):
@@ -145,10 +145,10 @@ def create_version_setting_file(upstream_directory):
         upstream_full_path = os.path.abspath( os.path.join( cloned_package_path, local_packages_upstream ) )
 
         local_packages_upstream_name = "local_packages_upstream"
-        remotes = run_command( "git remote", cloned_package_path )
+        remotes = get_git_remotes( cloned_package_path )
 
         if local_packages_upstream_name in remotes:
-            log( 1, "Skipping `%s` remote creation as it already exists: \n%s", local_packages_upstream_name, remotes )
+            log( 1, "Skipping `%s` remote creation as it already exists: \n%s", local_packages_upstream_name, "\n".join( remotes ) )
 
         else:
             output = run_command( "git remote add %s %s" % ( local_packages_upstream_name, local_packages_upstream ), cloned_package_path )
@@ -284,35 +284,16 @@ def normalizepath(iterable):
 @contextlib.contextmanager
 def lock_context_manager():
     """
+        Waits on the job scheduler queue until the running commands do not conflict with it.
+
         https://stackoverflow.com/questions/12594148/skipping-execution-of-with-block
         https://stackoverflow.com/questions/27071524/python-context-manager-not-cleaning-up
         https://stackoverflow.com/questions/10447818/python-context-manager-conditionally-executing-body
         https://stackoverflow.com/questions/34775099/why-does-contextmanager-throws-a-runtime-error-generator-didnt-stop-after-thro
     """
-    try:
-        yield is_allowed_to_run()
-
-    finally:
-        free_mutex_lock()
-
-
-def free_mutex_lock():
-    global g_is_already_running
-    g_is_already_running = False
-
-
-def is_allowed_to_run():
-    """
-        Returns `True` when it is allowed to run the channel manager, `False` otherwise.
-    """
-    global g_is_already_running
-
-    if g_is_already_running:
-        print( "You are already running a command. Wait until it finishes or restart Sublime Text" )
-        return False
 
-    g_is_already_running = True
-    return True
+    with run_job( "copy_default_package" ) as is_allowed:
+        yield is_allowed
 
 
 if __name__ == "__main__":
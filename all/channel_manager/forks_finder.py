@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# These lines allow to use UTF-8 encoding and run this file with `./update.py`, instead of `python update.py`
+# https://stackoverflow.com/questions/7670303/purpose-of-usr-bin-python3
+# https://stackoverflow.com/questions/728891/correct-way-to-define-python-source-code-encoding
+#
+#
+
+#
+# Licensing
+#
+# Channel Manager Forks Finder, list the repositories forks with the GitHub API
+# Copyright (C) 2017 Evandro Coan <https://github.com/evandrocoan>
+#
+#  This program is free software; you can redistribute it and/or modify it
+#  under the terms of the GNU General Public License as published by the
+#  Free Software Foundation; either version 3 of the License, or ( at
+#  your option ) any later version.
+#
+#  This program is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import re
+import sys
+import json
+import time
+import threading
+
+from debug_tools import getLogger
+from debug_tools.third_part import load_data_file
+from debug_tools.third_part import write_data_file
+
+# Relative imports in Python 3
+# https://stackoverflow.com/questions/16981921/relative-imports-in-python-3
+try:
+    from .parallel_utilities import log_output
+    from .parallel_utilities import get_cancellation_token
+
+except( ImportError, ValueError ):
+    from parallel_utilities import log_output
+    from parallel_utilities import get_cancellation_token
+
+
+# # https://stackoverflow.com/questions/9079036/detect-python-version-at-runtime
+if sys.version_info[0] < 3:
+    import urllib2 as urllib
+    from urllib2 import HTTPError
+
+else:
+    import urllib.request as urllib
+    from urllib.error import HTTPError
+
+
+# Debugger settings: 0 - disabled, 127 - enabled
+log = getLogger( 127, __name__ )
+
+GITHUB_API_URL    = "https://api.github.com"
+FORKS_PER_PAGE    = 100
+REQUEST_TIMEOUT   = 60
+NEXT_PAGE_REGEX   = re.compile( r'<([^>]+)>;\s*rel="next"' )
+
+# How many times to request a page again after the API rate limit was exceeded
+MAXIMUM_RATE_LIMIT_RETRIES = 3
+
+
+def get_next_page(link_header):
+    """
+        @return the next page URL of a paginated response `Link` header, or `None` on the last page
+    """
+
+    if not link_header:
+        return None
+
+    matches = NEXT_PAGE_REGEX.search( link_header )
+    return matches.group( 1 ) if matches else None
+
+
+def get_rate_limit_reset(headers):
+    """
+        @return how many seconds to wait before the next request, when the response says the rate
+                limit was exceeded, otherwise 0
+    """
+    retry_after = headers.get( 'Retry-After' )
+
+    if retry_after and retry_after.isdigit():
+        return int( retry_after )
+
+    if headers.get( 'X-RateLimit-Remaining' ) == '0':
+        reset_time = headers.get( 'X-RateLimit-Reset', '' )
+
+        if reset_time.isdigit():
+            return max( 1, int( reset_time ) - int( time.time() ) )
+
+    return 0
+
+
+class ApiCache(object):
+    """
+        Saves the API responses bodies and their `ETag` on the `cache_file`, so the next requests
+        for the same URL are conditional and the unchanged responses are not downloaded again.
+    """
+
+    def __init__(self, cache_file):
+        self.lock = threading.Lock()
+        self.cache_file = cache_file
+        self.entries = load_data_file( cache_file ) if cache_file else {}
+
+    def get(self, url):
+
+        with self.lock:
+            return self.entries.get( url )
+
+    def set(self, url, etag, body, next_page):
+
+        with self.lock:
+            self.entries[url] = { "etag": etag, "body": body, "next_page": next_page }
+
+    def save(self):
+
+        if self.cache_file:
+
+            with self.lock:
+                write_data_file( self.cache_file, self.entries )
+
+
+class ForksFinder(object):
+    """
+        Lists all the forks of a GitHub repository, following the API pagination.
+
+        @param rate_limiter   a `TokenBucket` to acquire before each request
+        @param api_url        the API base URL, i.e., a local server for testing
+    """
+
+    def __init__(self, cache, rate_limiter=None, token=None, api_url=GITHUB_API_URL):
+        self.cache = cache
+        self.token = token
+        self.api_url = api_url.rstrip( "/" )
+        self.rate_limiter = rate_limiter
+
+    def find_forks(self, user, repository):
+        """
+            @return a list of tuples `(owner, clone_url)` of all the repository forks
+        """
+        forks = []
+
+        if repository.endswith( ".git" ):
+            repository = repository[:-4]
+
+        url = "%s/repos/%s/%s/forks?per_page=%d" % ( self.api_url, user, repository, FORKS_PER_PAGE )
+
+        while url:
+            body, url = self.get_page( url )
+
+            for fork in json.loads( body ):
+                forks.append( ( fork['owner']['login'], fork['clone_url'] ) )
+
+        return forks
+
+    def get_page(self, url):
+        """
+            @return the tuple `(body, next_page)` of the `url` response
+        """
+        cached = self.cache.get( url )
+        request = urllib.Request( url )
+
+        request.add_header( 'Accept', 'application/vnd.github.v3+json' )
+        request.add_header( 'User-Agent', 'ChannelManager' )
+
+        if self.token:
+            request.add_header( 'Authorization', 'token %s' % self.token )
+
+        if cached and cached.get( 'etag' ):
+            request.add_header( 'If-None-Match', cached['etag'] )
+
+        for attempt in range( MAXIMUM_RATE_LIMIT_RETRIES + 1 ):
+
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            try:
+                response = urllib.urlopen( request, timeout=REQUEST_TIMEOUT )
+
+            except HTTPError as error:
+
+                # The not modified responses do not count on the GitHub API rate limit
+                if error.code == 304 and cached:
+                    return cached['body'], cached['next_page']
+
+                rate_limit_reset = get_rate_limit_reset( error.headers )
+                cancellation_token = get_cancellation_token()
+
+                if error.code in ( 403, 429 ) and rate_limit_reset \
+                        and attempt < MAXIMUM_RATE_LIMIT_RETRIES and not cancellation_token.is_cancelled:
+                    log_output( "Warning: The API rate limit was exceeded, waiting %d seconds...", rate_limit_reset )
+
+                    if self.rate_limiter:
+                        self.rate_limiter.block( rate_limit_reset )
+
+                    else:
+                        cancellation_token.wait( rate_limit_reset )
+
+                    continue
+
+                raise
+
+            try:
+                body      = response.read().decode( 'utf-8' )
+                etag      = response.headers.get( 'ETag' )
+                next_page = get_next_page( response.headers.get( 'Link' ) )
+
+            finally:
+                response.close()
+
+            self.cache.set( url, etag, body, next_page )
+            return body, next_page
@@ -0,0 +1,826 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# These lines allow to use UTF-8 encoding and run this file with `./update.py`, instead of `python update.py`
+# https://stackoverflow.com/questions/7670303/purpose-of-usr-bin-python3
+# https://stackoverflow.com/questions/728891/correct-way-to-define-python-source-code-encoding
+#
+#
+
+#
+# Licensing
+#
+# Channel Manager Git Utilities, read the git repositories data without running git
+# Copyright (C) 2017 Evandro Coan <https://github.com/evandrocoan>
+#
+#  This program is free software; you can redistribute it and/or modify it
+#  under the terms of the GNU General Public License as published by the
+#  Free Software Foundation; either version 3 of the License, or ( at
+#  your option ) any later version.
+#
+#  This program is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import re
+import io
+import os
+import random
+import shutil
+import threading
+import collections
+
+
+# Relative imports in Python 3
+# https://stackoverflow.com/questions/16981921/relative-imports-in-python-3
+try:
+    from .channel_utilities import get_git_directory
+
+    from .parallel_utilities import WorkerPool
+    from .parallel_utilities import run_process
+    from .parallel_utilities import log_output
+    from .parallel_utilities import get_rate_limit_delay
+    from .parallel_utilities import get_cancellation_token
+
+except( ImportError, ValueError ):
+    from channel_utilities import get_git_directory
+
+    from parallel_utilities import WorkerPool
+    from parallel_utilities import run_process
+    from parallel_utilities import log_output
+    from parallel_utilities import get_rate_limit_delay
+    from parallel_utilities import get_cancellation_token
+
+
+from debug_tools import getLogger
+
+
+# Debugger settings: 0 - disabled, 127 - enabled
+log = getLogger( 127, __name__ )
+
+# https://git-scm.com/docs/git-config#_syntax
+GIT_CONFIG_SECTION_REGEX = re.compile( r'^\s*\[\s*([\w.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]' )
+GIT_CONFIG_VALUE_REGEX   = re.compile( r'^\s*([\w-]+)\s*(?:=\s*(.*?))?\s*$' )
+
+# The git commands which access the remote, i.e., they can fail because of the network
+NETWORK_COMMANDS = ( "clone", "fetch", "pull", "push", "ls-remote" )
+
+# The failures which can succeed by trying again later
+TRANSIENT_ERRORS_REGEX = re.compile( r"could not resolve host|timed out|connection (?:reset|refused|closed)|"
+        r"early eof|hung up unexpectedly|rpc failed|temporary failure|gnutls|ssl_read|"
+        r"the requested url returned error: (?:429|5\d\d)|http/\d(?:\.\d)? 5\d\d", re.IGNORECASE )
+
+# Only the URLs with a scheme or an user are remote, i.e., `https://host/path` or `git@host:path`
+URL_HOST_REGEX = re.compile( r"^(?:[a-z][\w+.-]*://(?:[^@/]*@)?|[^@/:]+@)([^/:]+)", re.IGNORECASE )
+
+MAXIMUM_PER_HOST      = 4
+MAXIMUM_RETRIES       = 3
+BACKOFF_DELAY         = 2
+MAXIMUM_BACKOFF_DELAY = 60
+
+# How many times to try locking the config file, while git holds it, i.e., on a concurrent fetch
+CONFIG_LOCK_ATTEMPTS = 5
+CONFIG_LOCK_DELAY    = 0.2
+
+g_remotes_lock  = threading.Lock()
+g_remotes_cache = {}
+
+# Shared by all the commands running on this process, as the remote limits are per user
+g_network_policy      = None
+g_network_policy_lock = threading.Lock()
+
+# Python 2 has no `os.replace()`
+replace_file = getattr( os, 'replace', os.rename )
+
+
+def get_git_common_directory(repository_path):
+    """
+        Returns the git directory holding the repository `config` file, which is not the git
+        directory for the git worktrees.
+    """
+    git_directory = get_git_directory( repository_path )
+    commondir_path = os.path.join( git_directory, "commondir" )
+
+    if os.path.isfile( commondir_path ):
+
+        with io.open( commondir_path, "r", encoding='utf-8' ) as file:
+            return os.path.normpath( os.path.join( git_directory, file.read().strip() ) )
+
+    return git_directory
+
+
+def parse_git_config_value(value):
+    """
+        Remove the comments and the quotes from a git config value.
+    """
+    result    = []
+    is_quoted = False
+    index     = 0
+
+    while index < len( value ):
+        character = value[index]
+
+        if character == '\\' and index + 1 < len( value ):
+            index += 1
+            result.append( { 'n': '\n', 't': '\t', 'b': '\b' }.get( value[index], value[index] ) )
+
+        elif character == '"':
+            is_quoted = not is_quoted
+
+        elif character in ( '#', ';' ) and not is_quoted:
+            break
+
+        else:
+            result.append( character )
+
+        index += 1
+
+    return "".join( result ).strip()
+
+
+def read_git_config(repository_path):
+    """
+        Parse the repository `config` file, without following its `include.path` entries.
+
+        @return a dictionary where the keys are tuples `(section, subsection)` and the values are
+                dictionaries with the lists of values of each variable, as they can be repeated,
+                i.e., `config[('remote', 'origin')]['url'][-1]`
+    """
+    config_path = os.path.join( get_git_common_directory( repository_path ), "config" )
+    return parse_git_config_file( config_path )
+
+
+def parse_git_config_file(config_path):
+    """
+        Parse a file with the git config syntax, as the `.gitmodules` file. See `read_git_config()`.
+    """
+    config = collections.OrderedDict()
+
+    if not os.path.isfile( config_path ):
+        return config
+
+    # The section and variable names are case insensitive, but the subsection names are not
+    section = None
+
+    with io.open( config_path, "r", encoding='utf-8' ) as file:
+
+        for line in file:
+            section_match = GIT_CONFIG_SECTION_REGEX.match( line )
+
+            if section_match:
+                section = ( section_match.group( 1 ).lower(), section_match.group( 2 ) )
+                config.setdefault( section, collections.OrderedDict() )
+
+                # The variables can also be on the same line as the section header
+                line = line[section_match.end():]
+
+            value_match = GIT_CONFIG_VALUE_REGEX.match( line )
+
+            if section and value_match:
+                name  = value_match.group( 1 ).lower()
+                value = value_match.group( 2 )
+
+                # A variable without value is a boolean true
+                value = "true" if value is None else parse_git_config_value( value )
+                config[section].setdefault( name, [] ).append( value )
+
+    return config
+
+
+def get_git_remotes(repository_path):
+    """
+        Returns an ordered dictionary with the repository remotes names and their URLs. The results
+        are cached until `clear_git_remotes_cache()` is called, instead of running `git remote` for
+        each time they are required.
+    """
+    repository_path = os.path.abspath( repository_path )
+
+    with g_remotes_lock:
+        remotes = g_remotes_cache.get( repository_path )
+
+    if remotes is None:
+        remotes = collections.OrderedDict()
+
+        for ( section, subsection ), variables in read_git_config( repository_path ).items():
+
+            if section == "remote" and subsection:
+                remotes[subsection] = variables.get( "url", [""] )[-1]
+
+        with g_remotes_lock:
+            g_remotes_cache[repository_path] = remotes
+
+    return remotes
+
+
+def iterate_submodules(repository_path, recursive=True):
+    """
+        Yields the absolute paths of the checked out submodules of the repository, including the
+        nested submodules, always yielding the parent submodules before their nested ones.
+
+        @param recursive   when False, the nested submodules are not yielded
+    """
+    gitmodules = parse_git_config_file( os.path.join( repository_path, ".gitmodules" ) )
+
+    for ( section, subsection ), variables in gitmodules.items():
+
+        if section == "submodule" and "path" in variables:
+            submodule_path = os.path.normpath( os.path.join( repository_path, variables["path"][-1] ) )
+
+            if os.path.exists( os.path.join( submodule_path, ".git" ) ):
+                yield submodule_path
+
+                if not recursive:
+                    continue
+
+                for nested_path in iterate_submodules( submodule_path ):
+                    yield nested_path
+
+
+def get_mirror_name(url):
+    """
+        Returns the mirror directory name for the remote `url`, which is the same for the URLs only
+        differing by the `.git` suffix, the trailing slashes or the host name case.
+    """
+    url = url.strip().rstrip( "/" )
+
+    if url.endswith( ".git" ):
+        url = url[:-4]
+
+    url = re.sub( r'^\w+://', '', url )
+    url = re.sub( r'^[^/:]+', lambda host: host.group( 0 ).lower(), url )
+
+    return re.sub( r'[^\w.-]+', '_', url ).strip( "_" ) + ".git"
+
+
+def update_mirror(mirrors_directory, url, git_executable="git"):
+    """
+        Create or update the bare mirror of the remote `url` inside the `mirrors_directory`.
+
+        @return the mirror path, or `None` when it could not be created
+    """
+    mirror_path = os.path.join( mirrors_directory, get_mirror_name( url ) )
+
+    if os.path.isdir( mirror_path ):
+        result = run_process( [ git_executable, "fetch", "--prune", "--tags", url,
+                "+refs/heads/*:refs/heads/*" ], mirror_path )
+
+        if result.returncode != 0:
+            log( 1, "Warning: Could not update the mirror of `%s`: %s", url, result.output )
+
+        # An outdated mirror still saves most of the download
+        return mirror_path
+
+    # Clone on a temporary directory, so an interrupted clone is not used as a mirror. It is not
+    # cloned with `--mirror`, otherwise it would also fetch the GitHub pull requests references
+    temporary_path = mirror_path + ".tmp"
+
+    if os.path.isdir( temporary_path ):
+        shutil.rmtree( temporary_path, ignore_errors=True )
+
+    result = run_process( [ git_executable, "clone", "--bare", url, temporary_path ], mirrors_directory )
+
+    if result.returncode != 0:
+        log( 1, "Warning: Could not create the mirror of `%s`: %s", url, result.output )
+        shutil.rmtree( temporary_path, ignore_errors=True )
+        return None
+
+    os.rename( temporary_path, mirror_path )
+    return mirror_path
+
+
+def update_mirrors(mirrors_directory, urls, jobs=1, git_executable="git"):
+    """
+        Create or update the bare mirrors of all the `urls`, fetching up to `jobs` of them at the
+        same time.
+
+        @return a dictionary with the mirror path of each url successfully mirrored
+    """
+    mirrors = {}
+    mirrors_lock = threading.Lock()
+
+    if not os.path.isdir( mirrors_directory ):
+        os.makedirs( mirrors_directory )
+
+    def update(url):
+        mirror_path = update_mirror( mirrors_directory, url, git_executable )
+
+        if mirror_path:
+
+            with mirrors_lock:
+                mirrors[url] = mirror_path
+
+    pool = WorkerPool( update, jobs )
+    log( 1, "Updating %d mirrors on `%s` with %d jobs...", len( urls ), mirrors_directory, jobs )
+
+    for url in sorted( set( urls ) ):
+        pool.submit( url )
+
+    pool.join()
+    return mirrors
+
+
+def get_shared_store(stores_directory, upstream_url, git_executable="git"):
+    """
+        Returns the path of the bare repository used as shared object store by all the forks of the
+        `upstream_url` project, creating it when it does not exist.
+    """
+    store_path = os.path.join( stores_directory, get_mirror_name( upstream_url ) )
+
+    if not os.path.isdir( store_path ):
+
+        if not os.path.isdir( stores_directory ):
+            os.makedirs( stores_directory )
+
+        result = run_process( [ git_executable, "init", "--quiet", "--bare", store_path ], stores_directory )
+
+        if result.returncode != 0:
+            raise RuntimeError( "Could not create the shared object store `%s`: %s" % ( store_path, result.output ) )
+
+    return store_path
+
+
+def add_alternate(repository_path, store_path):
+    """
+        Let the repository read the objects from the store, instead of fetching and saving them again.
+    """
+    objects_directory = os.path.join( os.path.abspath( store_path ), "objects" )
+    alternates_path   = os.path.join( get_git_common_directory( repository_path ), "objects", "info", "alternates" )
+
+    alternates = []
+
+    if os.path.isfile( alternates_path ):
+
+        with io.open( alternates_path, "r", encoding='utf-8' ) as file:
+            alternates = [ line.strip() for line in file if line.strip() ]
+
+    if objects_directory not in alternates:
+        alternates.append( objects_directory )
+
+        with io.open( alternates_path, "w", encoding='utf-8', newline='\n' ) as file:
+            file.write( u"\n".join( alternates ) + u"\n" )
+
+
+def fetch_into_store(store_path, url, namespace, git_executable="git", runner=run_process):
+    """
+        Fetch all the `url` branches and tags into the store `refs/shared/namespace/` references.
+
+        @param runner   the function running the fetch process, i.e., a `NetworkPolicy.run()`
+    """
+    namespace = re.sub( r'[^\w.-]+', '_', namespace ).strip( "_" )
+
+    return runner( [ git_executable, "fetch", "--quiet", "--prune", "--no-tags", url,
+            "+refs/heads/*:refs/shared/%s/heads/*" % namespace,
+            "+refs/tags/*:refs/shared/%s/tags/*" % namespace ], store_path )
+
+
+def move_objects_to_store(repository_path, store_path, namespace, git_executable="git"):
+    """
+        Copy all the objects reachable by the repository references to the store, keeping them
+        reachable by the store `refs/shared/namespace/` references, then remove them from the
+        repository, which keeps reading them from the store alternate.
+    """
+    namespace = re.sub( r'[^\w.-]+', '_', namespace ).strip( "_" )
+
+    result = run_process( [ git_executable, "fetch", "--quiet", "--prune", "--no-tags", os.path.abspath( repository_path ),
+            "+refs/*:refs/shared/%s/*" % namespace ], store_path )
+
+    if result.returncode != 0:
+        return result
+
+    # Pack the new loose objects on the store, so `prune-packed` can remove them from the repository
+    result = run_process( [ git_executable, "repack", "-d", "-q" ], store_path )
+
+    if result.returncode != 0:
+        return result
+
+    # https://git-scm.com/docs/git-repack#Documentation/git-repack.txt--l
+    result = run_process( [ git_executable, "repack", "-a", "-d", "-l", "-q" ], repository_path )
+
+    if result.returncode != 0:
+        return result
+
+    return run_process( [ git_executable, "prune-packed", "-q" ], repository_path )
+
+
+def remove_duplicate_branches(repository_path, kept_remotes, git_executable="git"):
+    """
+        Delete the remote branches pointing to the same commit as some other branch, as the forks
+        usually have lots of branches only copied from their upstream. The local branches and the
+        branches of the `kept_remotes` are never deleted.
+
+        @return a `ProcessResult` of the batched references deletion, or `None` when there was
+                nothing to delete
+    """
+    result = run_process( [ git_executable, "for-each-ref", "--format=%(objectname) %(refname) %(symref)",
+            "refs/heads", "refs/remotes" ], repository_path )
+
+    if result.returncode != 0:
+        return result
+
+    kept_prefixes = tuple( "refs/remotes/%s/" % remote for remote in kept_remotes )
+    kept_prefixes += ( "refs/heads/", )
+
+    references = []
+
+    for line in result.output.splitlines():
+        fields = line.split()
+
+        # Skip the symbolic references as `refs/remotes/origin/HEAD`
+        if len( fields ) == 2:
+            references.append( fields )
+
+    # Look first the kept branches, so the duplicated branches are always deleted from the forks
+    references.sort( key=lambda reference: ( not reference[1].startswith( kept_prefixes ), reference[1] ) )
+
+    seen_commits = set()
+    deletions    = []
+
+    for commit, reference in references:
+
+        if commit in seen_commits and not reference.startswith( kept_prefixes ):
+            deletions.append( "delete %s %s" % ( reference, commit ) )
+
+        seen_commits.add( commit )
+
+    if not deletions:
+        return None
+
+    log( 1, "Deleting %d duplicated branches on %s", len( deletions ), repository_path )
+    return run_process( [ git_executable, "update-ref", "--stdin" ], repository_path, "\n".join( deletions ) + "\n" )
+
+
+def remove_remotes(repository_path, remotes, git_executable="git"):
+    """
+        Remove all the `remotes` as `git remote rm` does, but with a single config file rewrite and a
+        single references transaction, instead of one of each for each remote.
+
+        @return a `ProcessResult` of the remote-tracking references deletion, or `None` when there
+                were no references to delete
+    """
+    remotes = set( remotes )
+
+    if not remotes:
+        return None
+
+    config_path = os.path.join( get_git_common_directory( repository_path ), "config" )
+
+    try:
+        remove_config_remotes( config_path, remotes )
+
+    except OSError as error:
+        log_output( "Warning: Could not lock `%s`, removing the remotes one by one: %s", config_path, error )
+        clear_git_remotes_cache( repository_path )
+
+        return remove_remotes_one_by_one( repository_path, remotes, git_executable )
+
+    clear_git_remotes_cache( repository_path )
+
+    result = run_process( [ git_executable, "for-each-ref", "--format=%(refname)", "refs/remotes" ], repository_path )
+
+    if result.returncode != 0:
+        return result
+
+    prefixes  = tuple( "refs/remotes/%s/" % remote for remote in remotes )
+    deletions = [ "delete %s" % reference for reference in result.output.splitlines() if reference.startswith( prefixes ) ]
+
+    if not deletions:
+        return None
+
+    # `--no-deref` deletes the `refs/remotes/name/HEAD` symbolic references instead of their targets
+    return run_process( [ git_executable, "update-ref", "--no-deref", "--stdin" ], repository_path,
+            "\n".join( deletions ) + "\n" )
+
+
+def remove_remotes_one_by_one(repository_path, remotes, git_executable="git"):
+    """
+        @return the `ProcessResult` of the first `git remote remove` which failed, or `None`
+    """
+    failed_result = None
+
+    for remote in sorted( remotes ):
+        result = run_process( [ git_executable, "remote", "remove", remote ], repository_path )
+
+        if result.returncode != 0 and not failed_result:
+            failed_result = result
+
+    clear_git_remotes_cache( repository_path )
+    return failed_result
+
+
+def create_lock_file(lock_path, file_path):
+    """
+        Create the lock file as git does, waiting a little while some git process holds it. It has
+        the `file_path` permissions, as it replaces that file.
+
+        https://git-scm.com/docs/api-lockfile
+        @return the opened lock file, or raises `OSError` when it is still locked
+    """
+    attempt = 1
+    mode    = os.stat( file_path ).st_mode & 0o777
+
+    while True:
+
+        try:
+            return os.fdopen( os.open( lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode ), "wb" )
+
+        except OSError:
+
+            if attempt >= CONFIG_LOCK_ATTEMPTS or get_cancellation_token().wait( CONFIG_LOCK_DELAY ):
+                raise
+
+            attempt += 1
+
+
+def remove_config_remotes(config_path, remotes):
+    """
+        Remove the `remotes` sections from the config file and unset the branches upstream settings
+        pointing to them, locking the config file as git does.
+    """
+    lock_path = config_path + ".lock"
+    lock_file = create_lock_file( lock_path, config_path )
+
+    try:
+
+        with io.open( config_path, "r", encoding='utf-8' ) as file:
+            lines = file.readlines()
+
+    except Exception:
+        lock_file.close()
+        os.remove( lock_path )
+        raise
+
+    # Split the file on blocks starting with their section header
+    blocks = [ [] ]
+
+    for line in lines:
+
+        if GIT_CONFIG_SECTION_REGEX.match( line ):
+            blocks.append( [] )
+
+        blocks[-1].append( line )
+
+    new_lines = []
+
+    for block in blocks:
+        section_match = block and GIT_CONFIG_SECTION_REGEX.match( block[0] )
+
+        if section_match:
+            section = ( section_match.group( 1 ).lower(), section_match.group( 2 ) )
+
+            if section[0] == "remote" and section[1] in remotes:
+                continue
+
+            if section[0] == "branch":
+                block = remove_branch_upstream( block, remotes )
+
+        new_lines.extend( block )
+
+    try:
+        lock_file.write( "".join( new_lines ).encode( 'utf-8' ) )
+        lock_file.close()
+        replace_file( lock_path, config_path )
+
+    except Exception:
+        lock_file.close()
+        os.remove( lock_path )
+        raise
+
+
+def remove_branch_upstream(block, remotes):
+    """
+        Remove the `remote`, `merge` and `pushremote` variables of a `branch` section block when
+        the branch upstream is one of the `remotes`.
+    """
+    variables = {}
+
+    for line in block[1:]:
+        value_match = GIT_CONFIG_VALUE_REGEX.match( line )
+
+        if value_match and value_match.group( 2 ) is not None:
+            variables[value_match.group( 1 ).lower()] = parse_git_config_value( value_match.group( 2 ) )
+
+    removed_names = set()
+
+    if variables.get( "remote" ) in remotes:
+        removed_names.update( ( "remote", "merge" ) )
+
+    if variables.get( "pushremote" ) in remotes:
+        removed_names.add( "pushremote" )
+
+    if not removed_names:
+        return block
+
+    new_block = [ block[0] ]
+
+    for line in block[1:]:
+        value_match = GIT_CONFIG_VALUE_REGEX.match( line )
+
+        if not value_match or value_match.group( 1 ).lower() not in removed_names:
+            new_block.append( line )
+
+    return new_block
+
+
+def get_reference_arguments(mirror_path):
+    """
+        Returns the `git clone` arguments to borrow the objects from the mirror while cloning, but
+        copying them, so the clone still works after the mirror is deleted.
+    """
+
+    if mirror_path:
+        return [ "--reference-if-able", mirror_path, "--dissociate" ]
+
+    return []
+
+
+def clear_git_remotes_cache(repository_path=None):
+    """
+        Forget the cached remotes of the `repository_path`, i.e., after adding or removing some of
+        its remotes, or of all repositories, when `repository_path` is `None`.
+    """
+
+    with g_remotes_lock:
+
+        if repository_path:
+            g_remotes_cache.pop( os.path.abspath( repository_path ), None )
+
+        else:
+            g_remotes_cache.clear()
+
+
+def get_url_host(url):
+    """
+        @return the host name of the remote `url`, or an empty string for the local paths
+    """
+    matches = URL_HOST_REGEX.match( url or "" )
+    return matches.group( 1 ).lower() if matches else ""
+
+
+def is_transient_error(output):
+    return bool( output and TRANSIENT_ERRORS_REGEX.search( output ) )
+
+
+class NetworkPolicy(object):
+    """
+        Runs the git commands which access the remote with at most `maximum_per_host` of them
+        running at the same time for each host, and retries the ones which failed because of a
+        transient network error up to `maximum_retries` times, waiting an exponential backoff with
+        jitter between the attempts, so the concurrent workers do not retry all at the same time.
+
+        The repositories whose commands still failed after all the attempts are kept on the
+        `failed_repositories` by the operation cancellation token, to be reported when that
+        operation finishes, as the concurrent commands share the same policy.
+    """
+
+    def __init__(self, maximum_per_host=MAXIMUM_PER_HOST, maximum_retries=MAXIMUM_RETRIES, backoff_delay=BACKOFF_DELAY,
+                runner=run_process):
+        """
+            @param runner   the function running the processes, as `run_process()`
+        """
+        self.lock = threading.Lock()
+        self.runner = runner
+        self.maximum_per_host = max( 1, maximum_per_host or MAXIMUM_PER_HOST )
+        self.maximum_retries  = max( 0, maximum_retries if maximum_retries is not None else MAXIMUM_RETRIES )
+        self.backoff_delay    = backoff_delay
+
+        self.host_semaphores = {}
+        self.failed_repositories = {}
+
+    def configure(self, maximum_per_host=None, maximum_retries=None):
+        """
+            Replace the settings given. The commands already waiting on some host keep its old limit.
+        """
+
+        with self.lock:
+
+            if maximum_per_host and maximum_per_host != self.maximum_per_host:
+                self.maximum_per_host = maximum_per_host
+                self.host_semaphores  = {}
+
+            if maximum_retries is not None:
+                self.maximum_retries = max( 0, maximum_retries )
+
+    def run(self, arguments, cwd, input_data=None, rate_limiter=None):
+        """
+            Run the process as `run_process()`, but only the git commands which access the remote are
+            limited and retried, the other ones are run right away.
+
+            @param rate_limiter   a `TokenBucket` to acquire before each attempt, which is blocked
+                                  when the remote says the requests are being rate limited
+        """
+
+        if len( arguments ) < 2 or arguments[1] not in NETWORK_COMMANDS:
+            return self.runner( arguments, cwd, input_data )
+
+        semaphore = self.get_host_semaphore( self.get_host( arguments, cwd ) )
+        attempt   = 0
+
+        while True:
+
+            if rate_limiter:
+                rate_limiter.acquire()
+
+            with semaphore:
+                result = self.runner( arguments, cwd, input_data )
+
+            if result.returncode == 0 or get_cancellation_token().is_cancelled:
+                return result
+
+            rate_limit_delay = get_rate_limit_delay( result.output )
+            is_rate_limited  = rate_limit_delay > 0
+
+            # Also block the other workers, even when this command is not retried
+            if is_rate_limited and rate_limiter:
+                rate_limiter.block( rate_limit_delay )
+
+            if attempt >= self.maximum_retries or not ( is_rate_limited or is_transient_error( result.output ) ):
+                break
+
+            is_waiting_limiter = is_rate_limited and rate_limiter
+            delay = rate_limit_delay if is_waiting_limiter else max( rate_limit_delay, self.get_backoff_delay( attempt ) )
+            attempt += 1
+
+            log.clean( 1, "Retrying `%s` on %s in %.1f seconds (attempt %d of %d)..." % (
+                    " ".join( arguments ), cwd, delay, attempt, self.maximum_retries ) )
+
+            # The next attempt waits on the blocked rate limiter, instead of on the backoff
+            if not is_waiting_limiter and get_cancellation_token().wait( delay ):
+                return result
+
+        with self.lock:
+            failed_repositories = self.failed_repositories.setdefault( get_cancellation_token(), collections.OrderedDict() )
+            failed_repositories[os.path.abspath( cwd )] = ( " ".join( arguments ), result )
+
+        return result
+
+    def get_backoff_delay(self, attempt):
+        delay = min( MAXIMUM_BACKOFF_DELAY, self.backoff_delay * 2 ** attempt )
+        return delay * random.uniform( 0.5, 1.5 )
+
+    def get_host(self, arguments, cwd):
+        """
+            @return the host of the first remote URL or remote name on the command `arguments`, or
+                    the `origin` remote host, when there is none
+        """
+        remotes = get_git_remotes( cwd ) if os.path.isdir( cwd ) else {}
+
+        for argument in arguments[2:]:
+            host = get_url_host( argument ) or get_url_host( remotes.get( argument ) )
+
+            if host:
+                return host
+
+        return get_url_host( remotes.get( "origin" ) )
+
+    def get_host_semaphore(self, host):
+
+        with self.lock:
+            semaphore = self.host_semaphores.get( host )
+
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore( self.maximum_per_host )
+                self.host_semaphores[host] = semaphore
+
+            return semaphore
+
+    def pop_failed_repositories(self):
+        """
+            @return the repositories which failed on the current operation, forgetting them
+        """
+
+        with self.lock:
+            return self.failed_repositories.pop( get_cancellation_token(), {} )
+
+    def log_failed_repositories(self):
+        failed_repositories = list( self.pop_failed_repositories().items() )
+
+        if failed_repositories:
+            log.newline( count=2 )
+            log( 1, "The following %d repositories failed their remote commands...", len( failed_repositories ) )
+
+            for repository_path, ( command, result ) in failed_repositories:
+                last_line = result.output.splitlines()[-1] if result.output else ""
+                log.clean( 1, "%s: %s (exit code %d) %s" % ( repository_path, command, result.returncode, last_line[:80] ) )
+
+
+def get_network_policy(maximum_per_host=None, maximum_retries=None):
+    """
+        @return the `NetworkPolicy` shared by all the commands of this process, after replacing
+                the settings given
+    """
+    global g_network_policy
+
+    with g_network_policy_lock:
+
+        if g_network_policy is None:
+            g_network_policy = NetworkPolicy( maximum_per_host, maximum_retries )
+
+        else:
+            g_network_policy.configure( maximum_per_host, maximum_retries )
+
+        return g_network_policy
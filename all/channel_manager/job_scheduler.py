@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# These lines allow to use UTF-8 encoding and run this file with `./update.py`, instead of `python update.py`
+# https://stackoverflow.com/questions/7670303/purpose-of-usr-bin-python3
+# https://stackoverflow.com/questions/728891/correct-way-to-define-python-source-code-encoding
+#
+#
+
+#
+# Licensing
+#
+# Channel Manager Job Scheduler, queue the channel commands and run the compatible ones together
+# Copyright (C) 2017 Evandro Coan <https://github.com/evandrocoan>
+#
+#  This program is free software; you can redistribute it and/or modify it
+#  under the terms of the GNU General Public License as published by the
+#  Free Software Foundation; either version 3 of the License, or ( at
+#  your option ) any later version.
+#
+#  This program is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import time
+import threading
+import contextlib
+
+
+# Relative imports in Python 3
+# https://stackoverflow.com/questions/16981921/relative-imports-in-python-3
+try:
+    from .parallel_utilities import start_cancellable_operation
+    from .parallel_utilities import finish_cancellable_operation
+
+except( ImportError, ValueError ):
+    from parallel_utilities import start_cancellable_operation
+    from parallel_utilities import finish_cancellable_operation
+
+
+from debug_tools import getLogger
+
+
+# Debugger settings: 0 - disabled, 127 - enabled
+log = getLogger( 127, __name__ )
+
+# The resources used by the commands, which can be shared with the other commands only reading
+# them, or exclusive, when the command changes them
+CHANNEL_FILES        = "channel files"
+INSTALLED_PACKAGES   = "installed packages"
+SUBMODULES_TAGS      = "submodules tags"
+SUBMODULES_REMOTES   = "submodules remotes"
+SUBMODULES_OBJECTS   = "submodules objects"
+SUBMODULES_WORKTREES = "submodules working trees"
+
+ALL_RESOURCES = ( CHANNEL_FILES, INSTALLED_PACKAGES, SUBMODULES_TAGS, SUBMODULES_REMOTES,
+        SUBMODULES_OBJECTS, SUBMODULES_WORKTREES )
+
+# The tuples `(shared, exclusive)` resources of each command, the other ones use all resources
+# exclusively
+COMMANDS_RESOURCES = {
+    "all":                 ( ( SUBMODULES_TAGS, ), ( CHANNEL_FILES, ) ),
+    "generate_shard":      ( ( SUBMODULES_TAGS, CHANNEL_FILES ), () ),
+    "merge_shards":        ( (), ( CHANNEL_FILES, ) ),
+    "watch":               ( (), () ),
+    "watch_regeneration":  ( ( SUBMODULES_TAGS, ), ( CHANNEL_FILES, ) ),
+    "git_tag":             ( (), ( SUBMODULES_TAGS, SUBMODULES_WORKTREES, CHANNEL_FILES ) ),
+    "git_tag_all":         ( (), ( SUBMODULES_TAGS, SUBMODULES_WORKTREES, CHANNEL_FILES ) ),
+    "cancel_operation":    ( (), () ),
+    "find_forks":          ( (), ( SUBMODULES_REMOTES, SUBMODULES_OBJECTS ) ),
+    "create_upstreams":    ( (), ( SUBMODULES_REMOTES, SUBMODULES_OBJECTS ) ),
+    "delete_remotes":      ( (), ( SUBMODULES_REMOTES, ) ),
+    "merge_upstreams":     ( ( SUBMODULES_OBJECTS, SUBMODULES_TAGS ), ( SUBMODULES_REMOTES, SUBMODULES_WORKTREES ) ),
+    "pull_origins":        ( ( SUBMODULES_OBJECTS, SUBMODULES_REMOTES, SUBMODULES_TAGS ), ( SUBMODULES_WORKTREES, ) ),
+    "pull":                ( ( SUBMODULES_OBJECTS, SUBMODULES_REMOTES, SUBMODULES_TAGS ), ( SUBMODULES_WORKTREES, ) ),
+    "fetch_origins":       ( ( SUBMODULES_OBJECTS, SUBMODULES_REMOTES, SUBMODULES_TAGS ), () ),
+    "push_tags":           ( ( SUBMODULES_REMOTES, SUBMODULES_TAGS ), () ),
+    "git_maintenance":     ( (), ( SUBMODULES_OBJECTS, ) ),
+    "statistics":          ( (), () ),
+    "create_pullrequests": ( (), () ),
+    "copy_default_package": ( (), ( INSTALLED_PACKAGES, ) ),
+}
+
+
+class Job(object):
+
+    def __init__(self, name, shared, exclusive):
+        self.name      = name
+        self.shared    = frozenset( shared )
+        self.exclusive = frozenset( exclusive )
+
+        self.state      = "queued"
+        self.queue_time = time.time()
+        self.start_time = None
+
+    def conflicts(self, other):
+        return bool( self.exclusive & ( other.shared | other.exclusive ) or other.exclusive & self.shared )
+
+
+class JobScheduler(object):
+    """
+        Queues the commands and runs the ones which do not conflict with the running commands at
+        the same time, i.e., fetching the submodules while reporting their disk usage. The
+        conflicting commands run on the order they were queued.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.queued_jobs  = []
+        self.running_jobs = []
+
+    @contextlib.contextmanager
+    def run_job(self, name, shared=(), exclusive=()):
+        """
+            Blocks the calling thread until the job can run.
+
+            @return True, or False when the queued job was cancelled by `cancel_queued()`
+        """
+        job = Job( name, shared, exclusive )
+
+        with self.condition:
+            self.queued_jobs.append( job )
+
+            if not self.can_start( job ):
+                log( 1, "Queuing the command `%s` until these commands finish: %s", name,
+                        ", ".join( other.name for other in self.get_conflicting_jobs( job ) ) )
+
+            while job.state == "queued" and not self.can_start( job ):
+                self.condition.wait()
+
+            if job.state == "cancelled":
+                log( 1, "The queued command `%s` was cancelled.", name )
+
+            else:
+                self.queued_jobs.remove( job )
+                self.running_jobs.append( job )
+
+                job.state      = "running"
+                job.start_time = time.time()
+
+        if job.state == "cancelled":
+            yield False
+            return
+
+        try:
+            yield True
+
+        finally:
+
+            with self.condition:
+                self.running_jobs.remove( job )
+                self.condition.notify_all()
+
+    def can_start(self, job):
+        return not self.get_conflicting_jobs( job )
+
+    def get_conflicting_jobs(self, job):
+        """
+            @return the running jobs and the jobs queued before the `job` which conflict with it
+        """
+        conflicting_jobs = [ other for other in self.running_jobs if job.conflicts( other ) ]
+
+        for other in self.queued_jobs:
+
+            if other is job:
+                break
+
+            if job.conflicts( other ):
+                conflicting_jobs.append( other )
+
+        return conflicting_jobs
+
+    def cancel_queued(self):
+        """
+            @return how many queued jobs were cancelled
+        """
+
+        with self.condition:
+            cancelled_jobs = self.queued_jobs
+            self.queued_jobs = []
+
+            for job in cancelled_jobs:
+                job.state = "cancelled"
+
+            self.condition.notify_all()
+            return len( cancelled_jobs )
+
+    def get_status(self):
+        """
+            @return a list of tuples `(name, state, seconds)` of the running and the queued jobs,
+                    where `seconds` is how long they are running or waiting
+        """
+        now = time.time()
+
+        with self.condition:
+            return [ ( job.name, job.state, now - ( job.start_time or job.queue_time ) )
+                    for job in self.running_jobs + self.queued_jobs ]
+
+
+class RunningCommands(object):
+    """
+        Counts the commands running on a module. Its commands check `is_running` to stop when they
+        are cancelled, or when the module is reloaded, as the new module has its own instance.
+    """
+
+    def __init__(self, on_finish=None):
+        """
+            @param on_finish   called after each command finishes
+        """
+        self.lock       = threading.Lock()
+        self.count      = 0
+        self.is_running = False
+        self.on_finish  = on_finish
+
+    @contextlib.contextmanager
+    def lock_context_manager(self, command):
+        """
+            Waits on the job scheduler queue until the `command` does not conflict with the running
+            commands, instead of refusing to run it.
+
+            https://stackoverflow.com/questions/12594148/skipping-execution-of-with-block
+            https://stackoverflow.com/questions/27071524/python-context-manager-not-cleaning-up
+            https://stackoverflow.com/questions/10447818/python-context-manager-conditionally-executing-body
+            https://stackoverflow.com/questions/34775099/why-does-contextmanager-throws-a-runtime-error-generator-didnt-stop-after-thro
+        """
+
+        with run_job( command ) as is_allowed:
+
+            if is_allowed:
+                self.start()
+
+            try:
+                yield is_allowed
+
+            finally:
+
+                if is_allowed:
+                    self.finish()
+
+    def start(self):
+
+        with self.lock:
+            self.count     += 1
+            self.is_running = True
+
+        start_cancellable_operation()
+
+    def finish(self):
+
+        with self.lock:
+            self.count -= 1
+
+            if self.count < 1:
+                self.is_running = False
+
+        if self.on_finish:
+            self.on_finish()
+
+        finish_cancellable_operation()
+
+    def stop(self):
+        """
+            Stop all the running commands, as the cancel command does.
+        """
+        self.is_running = False
+
+
+g_job_scheduler = JobScheduler()
+
+
+def run_job(name):
+    """
+        Context manager waiting until the command `name` can run with the running commands.
+
+        @return True, or False when the command was cancelled while queued
+    """
+    shared, exclusive = COMMANDS_RESOURCES.get( name, ( (), ALL_RESOURCES ) )
+    return g_job_scheduler.run_job( name, shared, exclusive )
+
+
+def cancel_queued_jobs():
+    cancelled_count = g_job_scheduler.cancel_queued()
+
+    if cancelled_count:
+        log( 1, "Cancelled %d queued commands.", cancelled_count )
+
+
+def log_jobs_status():
+    jobs_status = g_job_scheduler.get_status()
+
+    if not jobs_status:
+        log( 1, "There are no running or queued commands." )
+        return
+
+    lines = [ "{:<24s}  {:<8s}  {:>8s}".format( "Command", "State", "Seconds" ) ]
+
+    for name, state, seconds in jobs_status:
+        lines.append( "{:<24s}  {:<8s}  {:>8.0f}".format( name, state, seconds ) )
+
+    log.clean( 1, "\n".join( lines ) )
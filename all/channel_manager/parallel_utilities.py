@@ -0,0 +1,743 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# These lines allow to use UTF-8 encoding and run this file with `./update.py`, instead of `python update.py`
+# https://stackoverflow.com/questions/7670303/purpose-of-usr-bin-python3
+# https://stackoverflow.com/questions/728891/correct-way-to-define-python-source-code-encoding
+#
+#
+
+#
+# Licensing
+#
+# Channel Manager Parallel Utilities, run the channel operations concurrently
+# Copyright (C) 2017 Evandro Coan <https://github.com/evandrocoan>
+#
+#  This program is free software; you can redistribute it and/or modify it
+#  under the terms of the GNU General Public License as published by the
+#  Free Software Foundation; either version 3 of the License, or ( at
+#  your option ) any later version.
+#
+#  This program is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import re
+import sys
+import time
+import threading
+import subprocess
+import contextlib
+import collections
+
+# Relative imports in Python 3
+# https://stackoverflow.com/questions/16981921/relative-imports-in-python-3
+try:
+    from .channel_utilities import get_startup_info
+
+except( ImportError, ValueError ):
+    from channel_utilities import get_startup_info
+
+
+from debug_tools import getLogger
+from debug_tools.third_part import load_data_file
+from debug_tools.third_part import write_data_file
+
+
+# Debugger settings: 0 - disabled, 127 - enabled
+log = getLogger( 127, __name__ )
+
+g_print_lock  = threading.Lock()
+g_thread_data = threading.local()
+
+# How long to wait when the remote says the requests are being rate limited, but not for how long
+RATE_LIMIT_DELAY = 60
+RETRY_AFTER_REGEX = re.compile( r"retry[- ]after\W{0,3}(\d+)", re.IGNORECASE )
+
+# The minimum seconds between the checkpoint file writes
+CHECKPOINT_INTERVAL = 10
+
+# How many of the last lines of a process output to keep on the reports
+MAXIMUM_OUTPUT_LINES = 10
+
+# How many seconds the cancelled processes have to exit before being killed
+TERMINATE_TIMEOUT = 5
+
+# How much the last run duration weights on the expected duration of the next runs
+DURATION_WEIGHT = 0.5
+
+ProcessResult = collections.namedtuple( 'ProcessResult', 'returncode output duration' )
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+class CancellationToken(object):
+    """
+        Shared by all the threads of one running operation. When it is cancelled, it terminates the
+        child processes started by `run_process()` which are still running, and the next calls to
+        `run_process()` fail right away.
+    """
+
+    def __init__(self):
+        self.lock      = threading.Lock()
+        self.event     = threading.Event()
+        self.processes = set()
+
+    @property
+    def is_cancelled(self):
+        return self.event.is_set()
+
+    def cancel(self):
+
+        with self.lock:
+            self.event.set()
+            processes = list( self.processes )
+
+        if processes:
+            log( 1, "Terminating %d running processes...", len( processes ) )
+
+            for process in processes:
+                terminate_process( process )
+
+            # Only wait on another thread, as the cancel command should not block
+            thread = threading.Thread( target=kill_processes, args=(processes,) )
+            thread.daemon = True
+            thread.start()
+
+    def check(self):
+        """
+            Raises `OperationCancelled` after the token was cancelled.
+        """
+
+        if self.is_cancelled:
+            raise OperationCancelled( "Stopping the process as the operation was cancelled!" )
+
+    def wait(self, seconds):
+        """
+            Sleeps for `seconds` or until the token is cancelled.
+
+            @return True when the token was cancelled
+        """
+        self.event.wait( seconds )
+        return self.is_cancelled
+
+    def register(self, process):
+        """
+            @return False when the token is already cancelled, then the process must be stopped
+        """
+
+        with self.lock:
+
+            if self.is_cancelled:
+                return False
+
+            self.processes.add( process )
+            return True
+
+    def unregister(self, process):
+
+        with self.lock:
+            self.processes.discard( process )
+
+
+g_cancellation_lock = threading.Lock()
+
+# The tokens of the running operations, cancelled by `cancel_operations()`
+g_cancellation_tokens = set()
+
+# Used by the code running outside some operation, it is never cancelled
+g_uncancellable_token = CancellationToken()
+
+
+def get_cancellation_token():
+    """
+        @return the token of the operation running on the current thread
+    """
+    cancellation_tokens = getattr( g_thread_data, 'cancellation_tokens', None )
+    return cancellation_tokens[-1] if cancellation_tokens else g_uncancellable_token
+
+
+@contextlib.contextmanager
+def use_cancellation_token(cancellation_token):
+    """
+        Run the threads started by some operation with its token, as the tokens are per thread.
+    """
+    cancellation_tokens = getattr( g_thread_data, 'cancellation_tokens', None )
+
+    if cancellation_tokens is None:
+        cancellation_tokens = g_thread_data.cancellation_tokens = []
+
+    cancellation_tokens.append( cancellation_token )
+
+    try:
+        yield cancellation_token
+
+    finally:
+        cancellation_tokens.pop()
+
+
+def start_cancellable_operation():
+    """
+        Called when some operation starts on the current thread. Each operation has its own token,
+        then the operations started after some cancel are not cancelled by it.
+
+        @return the new operation token
+    """
+    cancellation_token = CancellationToken()
+
+    with g_cancellation_lock:
+        g_cancellation_tokens.add( cancellation_token )
+
+    if getattr( g_thread_data, 'cancellation_tokens', None ) is None:
+        g_thread_data.cancellation_tokens = []
+
+    g_thread_data.cancellation_tokens.append( cancellation_token )
+    return cancellation_token
+
+
+def finish_cancellable_operation():
+    cancellation_tokens = getattr( g_thread_data, 'cancellation_tokens', None )
+
+    if cancellation_tokens:
+        cancellation_token = cancellation_tokens.pop()
+
+        with g_cancellation_lock:
+            g_cancellation_tokens.discard( cancellation_token )
+
+
+def cancel_operations():
+    """
+        Cancel all the running operations, terminating their running processes.
+    """
+
+    with g_cancellation_lock:
+        cancellation_tokens = list( g_cancellation_tokens )
+
+    for cancellation_token in cancellation_tokens:
+        cancellation_token.cancel()
+
+
+def terminate_process(process):
+
+    try:
+        process.terminate()
+
+    except OSError:
+        pass
+
+
+def kill_processes(processes):
+    deadline = time.time() + TERMINATE_TIMEOUT
+
+    for process in processes:
+
+        while process.poll() is None and time.time() < deadline:
+            time.sleep( 0.1 )
+
+        if process.poll() is None:
+
+            try:
+                process.kill()
+
+            except OSError:
+                pass
+
+
+def log_output(message, *args):
+    """
+        Logs the message or, if the current thread is buffering its output with `output_buffer()`,
+        appends it to the buffer.
+    """
+    output_list = getattr( g_thread_data, 'output_list', None )
+
+    if output_list is None:
+        log( 1, message, *args )
+
+    else:
+        output_list.append( message % args if args else message )
+
+
+def is_output_buffered():
+    return getattr( g_thread_data, 'output_list', None ) is not None
+
+
+@contextlib.contextmanager
+def output_buffer(is_enabled=True):
+    """
+        Collects everything logged by `log_output()` on the current thread and print it at once
+        when leaving the context, so the output of concurrent workers does not interleave.
+    """
+
+    if not is_enabled:
+        yield
+        return
+
+    g_thread_data.output_list = []
+
+    try:
+        yield
+
+    finally:
+        output_list = g_thread_data.output_list
+        g_thread_data.output_list = None
+
+        if output_list:
+
+            with g_print_lock:
+                log.clean( 1, "\n".join( output_list ) )
+
+
+def run_process(arguments, cwd, input_data=None):
+    """
+        Run the process until it finishes, instead of printing its output while it runs. The
+        process is terminated when the running operations are cancelled by `cancel_operations()`.
+
+        @param input_data   a text to write to the process standard input
+
+        @return a `ProcessResult` with the process exit code, its merged stdout and stderr output,
+                and how many seconds it took to run
+    """
+    start_time = time.time()
+    cancellation_token = get_cancellation_token()
+
+    if cancellation_token.is_cancelled:
+        return ProcessResult( -1, "Not running `%s` as the operation was cancelled." % " ".join( arguments ), 0 )
+
+    try:
+        process = subprocess.Popen( arguments, cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT, startupinfo=get_startup_info() )
+
+        if not cancellation_token.register( process ):
+            terminate_process( process )
+
+        try:
+            output, _  = process.communicate( input_data.encode( 'utf-8' ) if input_data else None )
+            returncode = process.returncode
+            output     = output.decode( 'utf-8', 'replace' )
+
+        finally:
+            cancellation_token.unregister( process )
+
+    except OSError as error:
+        returncode = -1
+        output     = "Could not run `%s`: %s" % ( " ".join( arguments ), error )
+
+    return ProcessResult( returncode, output.strip(), time.time() - start_time )
+
+
+def trim_output(output, maximum_lines=MAXIMUM_OUTPUT_LINES):
+    """
+        Only keep the last `maximum_lines` of the output, as the errors are usually on its end.
+    """
+    lines = output.strip().splitlines()
+
+    if len( lines ) > maximum_lines:
+        lines = [ "... %d lines omitted ..." % ( len( lines ) - maximum_lines ) ] + lines[-maximum_lines:]
+
+    return "\n".join( lines )
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod( int( seconds ), 60 )
+    hours, minutes   = divmod( minutes, 60 )
+    return "%d:%02d:%02d" % ( hours, minutes, seconds )
+
+
+class WorkerPool(object):
+    """
+        Runs the `target` function for each submitted arguments on up to `jobs` threads.
+
+        When `jobs` is `1`, `submit()` runs the `target` right away on the calling thread, keeping the
+        sequential behavior and letting the exceptions propagate. Otherwise, `join()` must be called
+        to wait all the submitted items, including the ones submitted by the running items, and it
+        raises the first exception thrown by some item after stopping the pool.
+    """
+
+    def __init__(self, target, jobs=1):
+        self.target = target
+        self.jobs = max( 1, jobs or 1 )
+
+        # The workers run with the token of the operation which created the pool
+        self.cancellation_token = get_cancellation_token()
+
+        self.threads   = []
+        self.queue     = collections.deque()
+        self.condition = threading.Condition()
+
+        # How many items were submitted and did not finish yet, including the running ones
+        self.pending_count = 0
+        self.is_stopped    = False
+        self.is_joining    = False
+        self.exception_info = None
+
+    def submit(self, *arguments):
+
+        if self.jobs == 1:
+
+            if not self.is_stopped:
+                self.target( *arguments )
+
+            return
+
+        with self.condition:
+
+            if self.is_stopped:
+                return
+
+            self.pending_count += 1
+            self.queue.append( arguments )
+            self.condition.notify()
+
+            if len( self.threads ) < self.jobs:
+                thread = threading.Thread( target=self._run_worker )
+                thread.daemon = True
+                thread.start()
+                self.threads.append( thread )
+
+    def stop(self):
+        """
+            Discard the items not started yet, the running ones keep going until they finish.
+        """
+        with self.condition:
+            self.is_stopped = True
+            self.pending_count -= len( self.queue )
+
+            self.queue.clear()
+            self.condition.notify_all()
+
+    def join(self):
+
+        with self.condition:
+            self.is_joining = True
+            self.condition.notify_all()
+
+        for thread in list( self.threads ):
+            thread.join()
+
+        if self.exception_info:
+            exception_info = self.exception_info
+            self.exception_info = None
+
+            if sys.version_info[0] < 3:
+                raise exception_info[1]
+
+            raise exception_info[1].with_traceback( exception_info[2] )
+
+    def _run_worker(self):
+
+        with use_cancellation_token( self.cancellation_token ):
+            self._worker()
+
+    def _worker(self):
+
+        while True:
+
+            with self.condition:
+
+                # Wait because the running items can still submit new items
+                while not self.queue and ( self.pending_count > 0 or not self.is_joining ):
+                    self.condition.wait()
+
+                if not self.queue:
+                    return
+
+                arguments = self.queue.popleft()
+
+            try:
+                self.target( *arguments )
+
+            except BaseException:
+
+                with self.condition:
+
+                    if not self.exception_info:
+                        self.exception_info = sys.exc_info()
+
+                self.stop()
+
+            finally:
+
+                with self.condition:
+                    self.pending_count -= 1
+                    self.condition.notify_all()
+
+
+def get_rate_limit_delay(output):
+    """
+        @param output   the output of a command which accessed the remote
+        @return how many seconds to wait when the remote output says the requests are being rate
+                limited, otherwise 0
+    """
+
+    if not output:
+        return 0
+
+    matches = RETRY_AFTER_REGEX.search( output )
+
+    if matches:
+        return int( matches.group( 1 ) )
+
+    if "rate limit" in output.lower():
+        return RATE_LIMIT_DELAY
+
+    return 0
+
+
+class TokenBucket(object):
+    """
+        Limits how many operations start per second across all the threads sharing it. Up to `burst`
+        operations start right away after the bucket was idle, then they start at `rate` per second.
+        A `rate` of `0` disables the limit.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.lock  = threading.Lock()
+        self.rate  = float( rate or 0 )
+        self.burst = max( 1, burst or 1 )
+
+        self.tokens        = float( self.burst )
+        self.last_time     = time.time()
+        self.blocked_until = 0
+
+    def acquire(self, tokens=1):
+        """
+            Blocks until the `tokens` are available.
+
+            @return how many seconds it waited
+        """
+        waited_time = 0
+
+        if self.rate <= 0:
+            return waited_time
+
+        while True:
+
+            with self.lock:
+                now = time.time()
+
+                if now < self.blocked_until:
+                    wait_time = self.blocked_until - now
+
+                else:
+                    self.tokens    = min( self.burst, self.tokens + ( now - self.last_time ) * self.rate )
+                    self.last_time = now
+
+                    if self.tokens >= tokens:
+                        self.tokens -= tokens
+                        return waited_time
+
+                    wait_time = ( tokens - self.tokens ) / self.rate
+
+            waited_time += wait_time
+
+            # The next command will not run anyway
+            if get_cancellation_token().wait( wait_time ):
+                return waited_time
+
+    def block(self, seconds):
+        """
+            Stop handing out tokens for the next `seconds`, i.e., after the remote said the requests
+            are being rate limited.
+        """
+
+        with self.lock:
+            self.tokens        = 0
+            self.last_time     = max( self.last_time, time.time() + seconds )
+            self.blocked_until = max( self.blocked_until, self.last_time )
+
+
+class CheckpointWriter(object):
+    """
+        Keeps which items finished in memory and only writes them to the `file_path` when `flush()`
+        is called or at most every `interval` seconds, instead of on every finished item.
+
+        The items are the 1-based indexes of a sequence and they are saved as the `key` count of
+        leading finished items, plus the `key_finished` list of the other finished items, as the
+        concurrent workers can finish them out of order.
+    """
+
+    def __init__(self, file_path, key, interval=CHECKPOINT_INTERVAL):
+        self.lock      = threading.Lock()
+        self.key       = key
+        self.file_path = file_path
+        self.interval  = interval
+
+        self.file_data = load_data_file( file_path )
+        self.finished_count   = self.file_data.get( key, 0 )
+        self.finished_indexes = set( self.file_data.get( key + "_finished", [] ) )
+
+        self.is_dirty   = False
+        self.last_write = time.time()
+
+    def is_finished(self, index):
+
+        with self.lock:
+            return index <= self.finished_count or index in self.finished_indexes
+
+    def finish(self, index):
+
+        with self.lock:
+            self.finished_indexes.add( index )
+
+            while self.finished_count + 1 in self.finished_indexes:
+                self.finished_count += 1
+                self.finished_indexes.remove( self.finished_count )
+
+            self.is_dirty = True
+
+            if time.time() - self.last_write > self.interval:
+                self._write()
+
+    def reset(self):
+        """
+            Forget all the finished items, i.e., the next run starts from the first item.
+        """
+
+        with self.lock:
+            self.finished_count = 0
+            self.finished_indexes.clear()
+            self._write()
+
+    def flush(self):
+
+        with self.lock:
+
+            if self.is_dirty:
+                self._write()
+
+    def _write(self):
+        self.file_data[self.key] = self.finished_count
+
+        if self.finished_indexes:
+            self.file_data[self.key + "_finished"] = sorted( self.finished_indexes )
+
+        else:
+            self.file_data.pop( self.key + "_finished", None )
+
+        write_data_file( self.file_path, self.file_data )
+        self.is_dirty   = False
+        self.last_write = time.time()
+
+
+class DurationDatabase(object):
+    """
+        Keeps how many seconds each command took on each repository on the last runs, saved on the
+        `file_path` as `{ "command": { "repository": seconds } }`, to estimate how long the next
+        runs will take.
+    """
+
+    def __init__(self, file_path, command):
+        self.lock      = threading.Lock()
+        self.command   = command
+        self.file_path = file_path
+
+        self.durations = load_data_file( file_path ).get( command, {} )
+        self.updated_durations = {}
+
+    def get_expected(self, repository):
+        """
+            @return the expected seconds, the average of the known repositories for the unknown
+                    ones, or 0 when there are no durations for the command
+        """
+
+        with self.lock:
+            duration = self.durations.get( repository )
+
+            if duration is None and self.durations:
+                return sum( self.durations.values() ) / len( self.durations )
+
+            return duration or 0
+
+    def add(self, repository, duration):
+
+        with self.lock:
+            last_duration = self.durations.get( repository )
+
+            if last_duration is not None:
+                duration = last_duration + ( duration - last_duration ) * DURATION_WEIGHT
+
+            self.durations[repository] = round( duration, 3 )
+            self.updated_durations[repository] = self.durations[repository]
+
+    def save(self):
+
+        with self.lock:
+
+            if not self.updated_durations:
+                return
+
+            # Other commands can be running at the same time, then only merge the updated ones
+            file_data = load_data_file( self.file_path )
+            file_data.setdefault( self.command, {} ).update( self.updated_durations )
+
+            write_data_file( self.file_path, file_data )
+            self.updated_durations = {}
+
+
+class ParallelProgress(object):
+    """
+        Reports the progress of the items finished by a `WorkerPool`, as the `sequence_timer()` only
+        measures the time between the items being submitted.
+
+        When the items expected durations are known, the remaining time is estimated from the
+        expected durations of the items not finished yet, instead of just their count.
+    """
+
+    def __init__(self, items_count, expected_total=0):
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+
+        self.items_count    = items_count
+        self.finished_count = 0
+
+        self.expected_total    = expected_total
+        self.finished_expected = 0
+
+    def add(self, expected_duration=0):
+
+        with self.lock:
+            self.items_count    += 1
+            self.expected_total += expected_duration
+
+    def finish(self, expected_duration=0):
+        """
+            @return the progress message for the just finished item
+        """
+        with self.lock:
+            self.finished_count    += 1
+            self.finished_expected += expected_duration
+
+        return self.get_info()
+
+    def get_info(self):
+
+        with self.lock:
+            finished_count    = self.finished_count
+            finished_expected = self.finished_expected
+            remaining_count    = max( 0, self.items_count - finished_count )
+            remaining_expected = max( 0, self.expected_total - finished_expected )
+
+        elapsed_time = time.time() - self.start_time
+
+        # Scale the expected durations by how fast they are finishing on this run
+        if finished_expected > 0:
+            remaining_time = elapsed_time / finished_expected * remaining_expected
+
+        elif remaining_expected > 0:
+            remaining_time = max( 0, remaining_expected - elapsed_time )
+
+        elif finished_count > 0:
+            remaining_time = elapsed_time / finished_count * remaining_count
+
+        else:
+            remaining_time = 0
+
+        return "Finished {:3d} of {:d}, elapsed {:s}, remaining {:s}".format( finished_count,
+                self.items_count, format_duration( elapsed_time ), format_duration( remaining_time ) )
@@ -35,15 +35,16 @@ import os
 import io
 import sys
 import imp
+import time
 import shlex
 
-import time
 import argparse
 import unittest
 import importlib
 import threading
 import subprocess
 import contextlib
+import collections
 
 
 # Relative imports in Python 3
@@ -53,12 +54,50 @@ try:
 
     from .channel_utilities import get_main_directory
     from .channel_utilities import assert_path
+    from .channel_utilities import get_modified_time
+
+    from .git_utilities import get_git_remotes
+    from .git_utilities import iterate_submodules
+    from .forks_finder import ApiCache
+    from .forks_finder import ForksFinder
+    from .job_scheduler import RunningCommands
+    from .job_scheduler import cancel_queued_jobs
+    from .job_scheduler import log_jobs_status
+    from .git_utilities import remove_duplicate_branches
+    from .git_utilities import remove_remotes
+    from .git_utilities import get_shared_store
+    from .git_utilities import add_alternate
+    from .git_utilities import fetch_into_store
+    from .git_utilities import move_objects_to_store
+    from .git_utilities import clear_git_remotes_cache
+    from .git_utilities import get_network_policy
+    from .git_utilities import MAXIMUM_PER_HOST
+    from .git_utilities import MAXIMUM_RETRIES
 
 except( ImportError, ValueError ):
     import settings as g_settings
 
     from channel_utilities import get_main_directory
     from channel_utilities import assert_path
+    from channel_utilities import get_modified_time
+
+    from git_utilities import get_git_remotes
+    from git_utilities import iterate_submodules
+    from forks_finder import ApiCache
+    from forks_finder import ForksFinder
+    from job_scheduler import RunningCommands
+    from job_scheduler import cancel_queued_jobs
+    from job_scheduler import log_jobs_status
+    from git_utilities import remove_duplicate_branches
+    from git_utilities import remove_remotes
+    from git_utilities import get_shared_store
+    from git_utilities import add_alternate
+    from git_utilities import fetch_into_store
+    from git_utilities import move_objects_to_store
+    from git_utilities import clear_git_remotes_cache
+    from git_utilities import get_network_policy
+    from git_utilities import MAXIMUM_PER_HOST
+    from git_utilities import MAXIMUM_RETRIES
 
 
 # Allow using this file on the website where the sublime
@@ -82,12 +121,47 @@ except( ImportError, ValueError ):
 
 from debug_tools import getLogger
 from debug_tools.utilities import join_path
-from debug_tools.third_part import load_data_file
-from debug_tools.third_part import write_data_file
 from debug_tools.third_part import get_section_option
 from debug_tools.third_part import print_python_envinronment
 from debug_tools.estimated_time_left import sequence_timer
 from debug_tools.estimated_time_left import progress_info
+from debug_tools.third_part import load_data_file
+from debug_tools.third_part import write_data_file
+
+
+# Relative imports in Python 3
+# https://stackoverflow.com/questions/16981921/relative-imports-in-python-3
+try:
+    from .parallel_utilities import WorkerPool
+    from .parallel_utilities import CheckpointWriter
+    from .parallel_utilities import TokenBucket
+    from .parallel_utilities import ParallelProgress
+    from .parallel_utilities import DurationDatabase
+    from .parallel_utilities import output_buffer
+    from .parallel_utilities import log_output
+    from .parallel_utilities import is_output_buffered
+    from .parallel_utilities import run_process
+    from .parallel_utilities import trim_output
+    from .parallel_utilities import format_duration
+    from .parallel_utilities import OperationCancelled
+    from .parallel_utilities import get_cancellation_token
+    from .parallel_utilities import cancel_operations
+
+except( ImportError, ValueError ):
+    from parallel_utilities import WorkerPool
+    from parallel_utilities import CheckpointWriter
+    from parallel_utilities import TokenBucket
+    from parallel_utilities import ParallelProgress
+    from parallel_utilities import DurationDatabase
+    from parallel_utilities import output_buffer
+    from parallel_utilities import log_output
+    from parallel_utilities import is_output_buffered
+    from parallel_utilities import run_process
+    from parallel_utilities import trim_output
+    from parallel_utilities import format_duration
+    from parallel_utilities import OperationCancelled
+    from parallel_utilities import get_cancellation_token
+    from parallel_utilities import cancel_operations
 
 
 # When there is an ImportError, means that Package Control is installed instead of PackagesManager.
@@ -136,11 +210,49 @@ if is_python_2:
 # sys.tracebacklimit = 1; raise ValueError
 CHANNEL_LOG_FILE     = os.path.join( g_settings.PACKAGE_ROOT_DIRECTORY, "all", "commands.log" )
 CHANNEL_SESSION_FILE = os.path.join( g_settings.PACKAGE_ROOT_DIRECTORY, "all", "last_session.json" )
-FIND_FORKS_PATH      = os.path.join( g_settings.PACKAGE_ROOT_DIRECTORY, "find_forks" )
+FOREACH_REPORT_FILE  = os.path.join( g_settings.PACKAGE_ROOT_DIRECTORY, "all", "foreach_report.json" )
+MERGED_HEADS_FILE    = os.path.join( g_settings.PACKAGE_ROOT_DIRECTORY, "all", "merged_heads.json" )
+FORKS_CACHE_FILE     = os.path.join( g_settings.PACKAGE_ROOT_DIRECTORY, "all", "forks_cache.json" )
+MAINTENANCE_REPORT_FILE = os.path.join( g_settings.PACKAGE_ROOT_DIRECTORY, "all", "maintenance_report.json" )
+STATISTICS_REPORT_FILE  = os.path.join( g_settings.PACKAGE_ROOT_DIRECTORY, "all", "submodules_statistics.json" )
+COMMANDS_DURATIONS_FILE = os.path.join( g_settings.PACKAGE_ROOT_DIRECTORY, "all", "commands_durations.json" )
+
+# How many remotes to fetch by each `git fetch --multiple` command
+REMOTES_PER_FETCH = 50
+
+# How many tags to push by each `git push` command
+TAGS_PER_PUSH = 100
+
+# How many times to run the tags query before and after the maintenance, keeping the fastest run
+TAGS_QUERY_RUNS = 3
+
+# The submodules statistics which the report can be sorted by, the sizes are in KiB
+STATISTICS_FIELDS = ( "disk_size", "pack_size", "loose_size", "worktree_size", "objects", "loose_objects",
+        "packs", "refs", "tags", "remote_branches", "remotes" )
+
+# How many submodules to print on the statistics table
+STATISTICS_TABLE_ROWS = 20
 
 # How many errors are acceptable when the GitHub API request fails
 MAXIMUM_REQUEST_ERRORS = 1
-g_is_already_running   = False
+
+# How many commands accessing the remote can start per second, after the first burst ones
+REMOTE_REQUESTS_RATE  = 2.0
+REMOTE_REQUESTS_BURST = 6
+
+# How many directories levels to look for the `.sublime-project` file on the project folders
+PROJECT_SEARCH_DEPTH = 2
+
+# The Sublime Text `Data` folder directories which never have the channel project file
+PROJECT_SEARCH_SKIPPED = ( "Packages", "Installed Packages", "Cache", "Index", "Backup", "Lib" )
+
+# The channel root found for each set of project folders and their modified times
+g_project_roots = {}
+
+# How many seconds the nested sections took while processing their parent section on this thread
+g_section_timer = threading.local()
+
+g_running_commands     = RunningCommands()
 command_line_interface = cmd.Cli( None, False )
 
 
@@ -157,11 +269,20 @@ log = getLogger( 127, __name__ )
 # log( 1, "PACKAGE_ROOT_DIRECTORY: " + g_settings.PACKAGE_ROOT_DIRECTORY )
 
 
-def main(command=None):
+def main(command=None, jobs=1):
+    """
+        @param jobs   how many repositories to process concurrently by the commands which walk
+                      through the `.gitmodules` sections
+    """
     log( 1, "Entering on main(1) " + str( command ) )
     global CHANNEL_ROOT_DIRECTORY
 
     maximum_repositories   = 0
+    shared_objects         = None
+    requests_rate          = REMOTE_REQUESTS_RATE
+    requests_burst         = REMOTE_REQUESTS_BURST
+    maximum_per_host       = MAXIMUM_PER_HOST
+    network_retries        = MAXIMUM_RETRIES
     synced_repositories    = False
     argumentsNamespace     = None
     CHANNEL_ROOT_DIRECTORY = get_main_directory( g_settings.PACKAGE_ROOT_DIRECTORY )
@@ -179,6 +300,35 @@ def main(command=None):
                 help="The maximum count of repositories/requests to process per file. "
                 "Only valid when using `--merge-upstreams` option." )
 
+        argumentParser.add_argument( "-j", "--jobs", action="store", type=int,
+                help="How many repositories to process concurrently. The default is 1. "
+                "Valid when using `--merge-upstreams`, `--find-forks`, `--create-upstreams`, "
+                "`--delete-remotes`, `--pull-origins`, `--fetch-origins`, `--pull`, `--push-tags`, "
+                "`--git-maintenance` or `--statistics` options." )
+
+        argumentParser.add_argument( "-rr", "--requests-rate", action="store", type=float,
+                help="How many commands accessing the remote can start per second, after the first "
+                "`--requests-burst` ones. The default is %s and 0 disables the limit. "
+                "Valid when using `--merge-upstreams` or `--find-forks` options." % REMOTE_REQUESTS_RATE )
+
+        argumentParser.add_argument( "-rb", "--requests-burst", action="store", type=int,
+                help="How many commands accessing the remote can start right away. The default is %s."
+                % REMOTE_REQUESTS_BURST )
+
+        argumentParser.add_argument( "-mh", "--maximum-per-host", action="store", type=int,
+                help="How many commands accessing the remote can run at the same time for each host. "
+                "The default is %s." % MAXIMUM_PER_HOST )
+
+        argumentParser.add_argument( "-nr", "--network-retries", action="store", type=int,
+                help="How many times to retry the commands accessing the remote which failed because "
+                "of a network error, waiting longer after each attempt. The default is %s." % MAXIMUM_RETRIES )
+
+        argumentParser.add_argument( "-so", "--shared-objects", action="store",
+                help="A directory where to keep one shared object store for each upstream project. "
+                "The forks and upstream remotes objects are moved to it, and the submodules read them "
+                "from it as a git alternate, therefore, this directory must not be deleted. "
+                "Valid when using `--find-forks` or `--create-upstreams` options." )
+
         argumentParser.add_argument( "-s", "--synced-repositories", action="store_true",
                 help="Reports which repositories not Synchronized with Pull Requests. "
                 "Only valid when using `--merge-upstreams` option." )
@@ -194,6 +344,19 @@ def main(command=None):
         argumentParser.add_argument( "-t", "--push-tags", action="store_true",
                 help="Perform a git push for all submodules tags to their respective remote repository" )
 
+        argumentParser.add_argument( "-gm", "--git-maintenance", action="store_true",
+                help="Pack the references, repack the loose objects, prune the old unreachable objects "
+                "and write the commit-graph on all submodules, reporting how long the tags queries "
+                "used by the channel generation took before and after it." )
+
+        argumentParser.add_argument( "-st", "--statistics", action="store_true",
+                help="Collect the objects, packs, references, remotes and working tree sizes of all "
+                "submodules and save them on the file: %s" % STATISTICS_REPORT_FILE )
+
+        argumentParser.add_argument( "-sb", "--sort-by", action="store", choices=STATISTICS_FIELDS,
+                help="Which statistic to sort the `--statistics` report by, from the biggest to the "
+                "smallest. The default is `disk_size`." )
+
         argumentParser.add_argument( "-u", "--create-upstreams", action="store_true",
                 help="Find all repositories on the `.gitmodules` which has the key `upstream` and add"
                 "it as a remote on the respective repository." )
@@ -223,6 +386,28 @@ def main(command=None):
     if argumentsNamespace and argumentsNamespace.maximum_repositories:
         maximum_repositories = argumentsNamespace.maximum_repositories
 
+    if argumentsNamespace and argumentsNamespace.jobs:
+        jobs = argumentsNamespace.jobs
+
+    if argumentsNamespace and argumentsNamespace.shared_objects:
+        shared_objects = os.path.abspath( argumentsNamespace.shared_objects )
+
+    if argumentsNamespace and argumentsNamespace.requests_rate is not None:
+        requests_rate = argumentsNamespace.requests_rate
+
+    if argumentsNamespace and argumentsNamespace.requests_burst:
+        requests_burst = argumentsNamespace.requests_burst
+
+    if argumentsNamespace and argumentsNamespace.maximum_per_host:
+        maximum_per_host = argumentsNamespace.maximum_per_host
+
+    if argumentsNamespace and argumentsNamespace.network_retries is not None:
+        network_retries = argumentsNamespace.network_retries
+
+    # Shared by all the workers, as the remote limits are per user
+    rate_limiter   = TokenBucket( requests_rate, requests_burst )
+    network_policy = get_network_policy( maximum_per_host, network_retries )
+
     if argumentsNamespace and argumentsNamespace.synced_repositories:
         synced_repositories = argumentsNamespace.synced_repositories
 
@@ -232,36 +417,53 @@ def main(command=None):
             log( 1, "using the Sublime Text Channel Development version." )
 
         else:
-            RunBackstrokeThread("find_forks", maximum_repositories).start()
+            RunBackstrokeThread("find_forks", maximum_repositories, jobs=jobs, rate_limiter=rate_limiter,
+                    shared_objects=shared_objects, network_policy=network_policy).start()
 
     elif command == "-t" or argumentsNamespace and argumentsNamespace.push_tags:
-        RunGitForEachSubmodulesThread( "git push --tags" ).start()
+        PushMissingTagsThread( jobs, network_policy ).start()
+
+    elif command == "-gm" or argumentsNamespace and argumentsNamespace.git_maintenance:
+        GitMaintenanceThread( jobs ).start()
+
+    elif command == "-st" or argumentsNamespace and argumentsNamespace.statistics:
+        SubmodulesStatisticsThread( jobs, argumentsNamespace and argumentsNamespace.sort_by ).start()
 
     elif command == "-p" or argumentsNamespace and argumentsNamespace.pull:
-        RunGitForEachSubmodulesThread( "git checkout master && "
-                "git branch --set-upstream-to=origin/master master && git pull --rebase" ).start()
+        RunGitForEachSubmodulesThread( [
+                [ "git", "checkout", "master" ],
+                [ "git", "branch", "--set-upstream-to=origin/master", "master" ],
+                [ "git", "pull", "--rebase" ],
+            ], jobs, network_policy, "pull" ).start()
 
     elif command == "-o" or argumentsNamespace and argumentsNamespace.pull_origins:
-        RunBackstrokeThread("pull_origins", maximum_repositories).start()
+        RunBackstrokeThread("pull_origins", maximum_repositories, jobs=jobs, network_policy=network_policy).start()
 
     elif command == "-fo" or argumentsNamespace and argumentsNamespace.fetch_origins:
-        RunBackstrokeThread("fetch_origins", maximum_repositories).start()
+        RunBackstrokeThread("fetch_origins", maximum_repositories, jobs=jobs, network_policy=network_policy).start()
 
     elif command == "-m" or argumentsNamespace and argumentsNamespace.merge_upstreams:
-        RunBackstrokeThread("merge_upstreams", maximum_repositories).start()
+        RunBackstrokeThread("merge_upstreams", maximum_repositories, jobs=jobs, rate_limiter=rate_limiter,
+                network_policy=network_policy).start()
 
     elif command == "-pr" or argumentsNamespace and argumentsNamespace.create_pullrequests:
         RunBackstrokeThread("create_pullrequests", maximum_repositories, synced_repositories).start()
 
     elif command == "-u" or argumentsNamespace and argumentsNamespace.create_upstreams:
-        RunBackstrokeThread("create_upstreams", maximum_repositories).start()
+        RunBackstrokeThread("create_upstreams", maximum_repositories, jobs=jobs,
+                shared_objects=shared_objects, network_policy=network_policy).start()
 
     elif command == "-d" or argumentsNamespace and argumentsNamespace.delete_remotes:
-        RunBackstrokeThread("delete_remotes", maximum_repositories).start()
+        RunBackstrokeThread("delete_remotes", maximum_repositories, jobs=jobs, network_policy=network_policy).start()
 
     elif command == "cancel_operation" or argumentsNamespace and argumentsNamespace.cancel_operation:
+        cancel_queued_jobs()
+        cancel_operations()
         free_mutex_lock()
 
+    elif command == "jobs_status":
+        log_jobs_status()
+
     elif not command:
         argumentParser.print_help()
 
@@ -271,79 +473,109 @@ def main(command=None):
     # unittest.main()
 
 
-@contextlib.contextmanager
-def lock_context_manager():
+def free_mutex_lock():
     """
-        https://stackoverflow.com/questions/12594148/skipping-execution-of-with-block
-        https://stackoverflow.com/questions/27071524/python-context-manager-not-cleaning-up
-        https://stackoverflow.com/questions/10447818/python-context-manager-conditionally-executing-body
-        https://stackoverflow.com/questions/34775099/why-does-contextmanager-throws-a-runtime-error-generator-didnt-stop-after-thro
+        Stop all the running commands, as the cancel command does.
     """
-    try:
-        yield is_allowed_to_run()
-
-    finally:
-        free_mutex_lock()
+    g_running_commands.stop()
 
 
-def free_mutex_lock():
-    global g_is_already_running
-    g_is_already_running = False
-
-
-def is_allowed_to_run():
-    global g_is_already_running
-
-    if g_is_already_running:
-        log( 1, "You are already running a command. Wait until it finishes or restart Sublime Text" )
-        return False
+def check_cancellation():
+    """
+        Raises `OperationCancelled` when the operation was cancelled, or this module was reloaded.
+    """
+    get_cancellation_token().check()
 
-    g_is_already_running = True
-    return True
+    if not g_running_commands.is_running:
+        raise OperationCancelled( "Stopping the process as this Python module was reloaded!" )
 
 
 # My forks upstreams
 #
 class RunBackstrokeThread(threading.Thread):
 
-    def __init__(self, command, maximum_repositories=0, synced_repositories=False):
+    def __init__(self, command, maximum_repositories=0, synced_repositories=False, jobs=1, rate_limiter=None,
+                shared_objects=None, network_policy=None):
+        """
+            @param shared_objects   the directory with the shared object stores of the upstream projects
+            @param network_policy   the `NetworkPolicy` running the commands which access the remote
+        """
         threading.Thread.__init__(self)
         self.command = command
         self.maximum_repositories = maximum_repositories
         self.synced_repositories = synced_repositories
+        self.shared_objects = shared_objects
+        self.jobs = jobs or 1
+        self.rate_limiter = rate_limiter or TokenBucket( REMOTE_REQUESTS_RATE, REMOTE_REQUESTS_BURST )
+        self.network_policy = network_policy or get_network_policy()
+
+        # The origin and upstream branches heads of the last successful merge of each submodule
+        self.merged_heads = {}
+        self.merged_heads_lock = threading.Lock()
 
     def run(self):
         log( 1, "RunBackstrokeThread::run" )
 
-        with lock_context_manager() as is_allowed:
+        with g_running_commands.lock_context_manager( self.command ) as is_allowed:
             if not is_allowed: return
 
-            if self.command == "find_forks":
-                git_file_path = os.path.join( CHANNEL_ROOT_DIRECTORY, '.gitmodules' )
+            try:
+                self.run_command()
+
+            except OperationCancelled as error:
+                log( 1, "%s The finished submodules were saved on: %s", error, CHANNEL_SESSION_FILE )
+
+            self.network_policy.log_failed_repositories()
+
+        log.newline()
+        log( 1, "Finished RunBackstrokeThread::run()" )
+
+    def run_command(self):
+        # The remotes can be changed outside between the commands
+        clear_git_remotes_cache()
+
+        if self.command == "find_forks":
+            git_file_path = os.path.join( CHANNEL_ROOT_DIRECTORY, '.gitmodules' )
+
+            api_cache = ApiCache( FORKS_CACHE_FILE )
+            self.forks_finder = ForksFinder( api_cache, self.rate_limiter, get_github_token() )
+
+            try:
                 self.run_general_command( CHANNEL_ROOT_DIRECTORY, git_file_path, self.command )
 
-            elif self.command in (
-                      "create_upstreams",
-                      "delete_remotes",
-                      "fetch_origins",
-                      "pull_origins",
-                      "merge_upstreams",
-                    ):
-                gitmodules_directory = get_channel_root_from_project()
-                log( 1, "gitmodules_directory: %s", gitmodules_directory )
-
-                git_file_path = os.path.join( gitmodules_directory, '.gitmodules' )
+            finally:
+                api_cache.save()
+
+        elif self.command in (
+                  "create_upstreams",
+                  "delete_remotes",
+                  "fetch_origins",
+                  "pull_origins",
+                  "merge_upstreams",
+                ):
+            gitmodules_directory = get_channel_root_from_project()
+            log( 1, "gitmodules_directory: %s", gitmodules_directory )
+
+            git_file_path = os.path.join( gitmodules_directory, '.gitmodules' )
+
+            if self.command == "merge_upstreams":
+                self.merged_heads = load_data_file( MERGED_HEADS_FILE )
+
+            try:
                 self.run_general_command( CHANNEL_ROOT_DIRECTORY, git_file_path, self.command )
 
-            elif self.command == "create_pullrequests":
-                self.run_githubpullrequests()
+            finally:
 
-            else:
-                log( 1, "RunBackstrokeThread::run, Invalid command: " + str( self.command ) )
+                if self.command == "merge_upstreams":
 
-        free_mutex_lock()
-        log.newline()
-        log( 1, "Finished RunBackstrokeThread::run()" )
+                    with self.merged_heads_lock:
+                        write_data_file( MERGED_HEADS_FILE, self.merged_heads )
+
+        elif self.command == "create_pullrequests":
+            self.run_githubpullrequests()
+
+        else:
+            log( 1, "RunBackstrokeThread::run, Invalid command: " + str( self.command ) )
 
     def run_githubpullrequests(self):
         token_file = join_path( CHANNEL_ROOT_DIRECTORY, 'Local', 'GITHUBPULLREQUESTS_TOKEN' )
@@ -375,223 +607,586 @@ class RunBackstrokeThread(threading.Thread):
 
     def run_general_command(self, base_root_directory, git_file_path, command):
         """
-            @param function_command   a function pointer to be called on each `.gitmodules` section.
+            Run the `command` on each `.gitmodules` section. On the main project, the sections are
+            processed by `self.jobs` concurrent workers, which also process the nested submodules
+            submitted by `recursiveily_process_submodules()`.
         """
         log( 1, "RunBackstrokeThread::run_general_command" )
-        maximum_errors = MAXIMUM_REQUEST_ERRORS
-
-        lastSection = load_data_file( CHANNEL_SESSION_FILE )
-        start_index = lastSection.get( command, 0 )
-
-        request_index = 0
-        successful_resquests = 0
+        generalSettingsConfigs = load_gitmodules( git_file_path )
 
-        # https://pymotw.com/3/configparser/
-        generalSettingsConfigs = configparser.RawConfigParser()
+        sections = generalSettingsConfigs.sections()
+        state    = GeneralCommandState( base_root_directory, command, generalSettingsConfigs, len( sections ), self.jobs )
 
-        # https://stackoverflow.com/questions/45415684/how-to-stop-tabs-on-python-2-7-rawconfigparser-throwing-parsingerror/
-        with open( git_file_path ) as fakeFile:
-            # https://stackoverflow.com/questions/22316333/how-can-i-resolve-typeerror-with-stringio-in-python-2-7
-            fakefile = io.StringIO( fakeFile.read().replace( u"\t", u"" ) )
-
-        log( 1, "RunBackstrokeThread::sections: " + git_file_path )
-        generalSettingsConfigs._read( fakefile, git_file_path )
-
-        sections       = generalSettingsConfigs.sections()
-        sections_count = len( sections )
+        pending_sections = []
+        state.pool       = WorkerPool( self.process_section, self.jobs if state.is_parallel else 1 )
 
         # https://stackoverflow.com/questions/22068050/iterate-over-sections-in-a-config-file
-        for section, pi in sequence_timer( sections, info_frequency=0 ):
-            request_index += 1
-            progress       = progress_info( pi )
-
-            if not g_is_already_running:
-                raise ImportError( "Stopping the process as this Python module was reloaded!" )
+        for request_index, section in enumerate( sections, start=1 ):
 
-            # Walk until the last processed index, skipping everything else
-            if start_index > 0:
-                start_index -= 1
+            # Skip the sections processed by the last session
+            if state.is_finished( request_index ):
                 continue
 
             # For quick testing
             if self.maximum_repositories and request_index > self.maximum_repositories:
                 break
 
-            self.save_session_file(base_root_directory, lastSection, command, request_index)
+            expected_duration = state.get_expected_duration( section )
+            state.progress.add( expected_duration )
+            pending_sections.append( ( request_index, section, expected_duration ) )
 
-            log( 1, "{:s}, {:3d}({:d}) of {:d}... {:s}".format(
-                    progress, request_index, successful_resquests, sections_count, section ) )
+        # Start the slowest sections first, so they do not end up running alone on the end of the run.
+        # The request index keeps the `.gitmodules` order, as the session file saves them by it.
+        if state.is_parallel:
+            pending_sections.sort( key=lambda pending_section: -pending_section[2] )
 
-            if command == "find_forks":
-                # https://docs.python.org/3/library/configparser.html#configparser.ConfigParser.get
-                forkUrl  = get_section_option( section, "url", generalSettingsConfigs )
-                forkpath = get_section_option( section, "path", generalSettingsConfigs )
-                upstream = get_section_option( section, "upstream", generalSettingsConfigs )
+        try:
 
-                # log( 1, "forkpath: " + forkpath )
-                # log( 1, "upstream: " + upstream )
-                if len( upstream ) > 20:
-                    successful_resquests += 1
-                    forkUser, _           = parse_upstream( forkUrl )
-                    user, repository      = parse_upstream( upstream )
+            for ( request_index, section, expected_duration ), pi in sequence_timer( pending_sections, info_frequency=0 ):
+                check_cancellation()
 
-                    # Find all forks, add them as remote and fetch them
-                    run( "python %s --user=%s --repo=%s" % ( FIND_FORKS_PATH, user, repository ),
-                        base_root_directory, forkpath )
+                if state.pool.is_stopped:
+                    break
+
+                # When running concurrently, the progress is reported as the sections finish
+                if state.is_parallel:
+                    progress = ""
 
-                    # Clean duplicate branches
-                    run( "sh %s/remove_duplicate_branches.sh %s" % ( FIND_FORKS_PATH, forkUser ),
-                        base_root_directory, forkpath )
+                elif state.progress.expected_total:
+                    progress = state.progress.get_info()
 
                 else:
-                    log.newline( count=3 )
-                    log( 1, "Error, invalid/missing upstream: " + str( upstream ) )
+                    progress = progress_info( pi )
 
-            elif command == "merge_upstreams":
-                # The GitHub API only allows about 30 requests per second for the merge_upstreams call,
-                # then we make it take a little longer so all the requests can be performed in a row.
-                time.sleep(2)
+                state.submit_section( section, request_index, progress, request_index, expected_duration )
 
-                # https://docs.python.org/3/library/configparser.html#configparser.ConfigParser.get
-                forkpath = get_section_option( section, "path", generalSettingsConfigs )
-                downstream = get_section_option( section, "url", generalSettingsConfigs )
+        except BaseException:
+            state.pool.stop()
+            raise
 
-                upstream = get_section_option( section, "upstream", generalSettingsConfigs )
-                branches = get_section_option( section, "branches", generalSettingsConfigs )
-                local_branch, upstream_branch = parser_branches( branches )
+        finally:
 
-                if not upstream:
-                    log( 1, "Skipping %s because there is not upstream defined...", section )
-                    continue
+            # Also wait the running sections when the submission was cancelled
+            try:
+                state.pool.join()
 
-                log( 1, branches )
-                log( 1, downstream )
-                log( 1, upstream )
-                if not local_branch or not upstream_branch:
-                    maximum_errors -= 1
+            finally:
 
-                    log.newline( count=3 )
-                    log( 1, "ERROR! Invalid branches `%s`", branches )
+                if state.checkpoint:
+                    state.checkpoint.flush()
 
-                    if maximum_errors < 1:
-                        break
+                state.durations.save()
 
-                    continue
+        if state.failed_forks:
+            log.newline()
+            log( 1, "Could not list the forks of %d sections, run the command again to retry them:",
+                    len( state.failed_forks ) )
 
-                successful_resquests += 1
-                run( "git checkout %s" % local_branch, base_root_directory, forkpath )
-                run( "git fetch", base_root_directory, forkpath )
-                run( "git pull --rebase", base_root_directory, forkpath )
+            for section in sorted( state.failed_forks ):
+                log( 1, "    %s", section )
 
-                upstream_user, upstream_repository = parse_upstream( upstream )
-                remotes = command_line_interface.execute(
-                    shlex.split( "git remote" ),
-                    os.path.join( base_root_directory, forkpath ),
-                    short_errors=True
-                )
+        # Only reset the session file when finishing the main thread
+        if state.checkpoint:
+            log.newline( count=2 )
 
-                if upstream_user not in remotes:
-                    run( "git remote add %s %s" % ( upstream_user, upstream ), base_root_directory, forkpath )
+            if state.maximum_errors == MAXIMUM_REQUEST_ERRORS and not state.failed_forks:
+                state.checkpoint.reset()
+                log( 1, "Congratulations! It was a successful execution." )
 
-                run( "git fetch %s" % ( upstream_user ), base_root_directory, forkpath )
-                run( "git merge %s/%s" % ( upstream_user, upstream_branch ), base_root_directory, forkpath )
+            else:
+                log( 1, "Attention! There were errors on execution, please review its output." )
 
-            elif command == "create_upstreams" or command == "delete_remotes":
-                forkpath = get_section_option( section, "path", generalSettingsConfigs )
-                upstream = get_section_option( section, "upstream", generalSettingsConfigs )
+        return True
 
-                if len( upstream ) > 20:
-                    successful_resquests += 1
-                    user, repository     = parse_upstream( upstream )
+    def process_section(self, state, section, request_index, progress, main_index, expected_duration):
+        """
+            @param main_index          the index of the main project section which this section is nested on
+            @param expected_duration   how many seconds the section took on the last runs
+        """
 
-                    remotes = command_line_interface.execute(
-                        shlex.split( "git remote" ),
-                        os.path.join( base_root_directory, forkpath ),
-                        short_errors=True
-                    )
+        check_cancellation()
 
-                    if command == "create_upstreams":
+        with output_buffer( state.is_parallel ):
+            log_output( "{:s}, {:3d}({:d}) of {:d}... {:s}".format(
+                    progress, request_index, state.successful_resquests, state.sections_count, section ) )
 
-                        if user not in remotes:
-                            run( "git remote add %s %s" % ( user, upstream ), base_root_directory, forkpath )
-                            run( "git fetch %s" % ( user ), base_root_directory, forkpath )
+            duration, is_successful = self.run_timed_section_command( state, section, main_index )
 
-                    else:
-                        remote_index = 0
-                        remotes_list = remotes.split( "\n" )
+            # Its processes were terminated, then it is not saved as finished on the session file
+            check_cancellation()
 
-                        # -2 because I am discarding myself and my upstream
-                        remotes_count = len( remotes_list ) - 2
+            if is_successful:
+                state.durations.add( state.get_repository( section ), duration )
 
-                        for remote, pi in sequence_timer( remotes_list, info_frequency=0 ):
+            progress = state.progress.finish( expected_duration )
 
-                            if remote not in ( "origin", user ):
-                                progress      = progress_info( pi )
-                                remote_index += 1
+            if state.is_parallel:
+                log_output( "%s... %s", progress, section )
 
-                                log( 1, "Cleaning remote {:3d} of {:d} ({:s}): {:<20s} {:s}".format(
-                                        remote_index, remotes_count, progress, remote, forkpath ) )
+        state.main_state.finish_section( main_index, is_successful )
 
-                                run( "git remote rm %s" % ( remote ), base_root_directory, forkpath )
+    def run_timed_section_command(self, state, section, main_index):
+        """
+            When running sequentially, the nested sections are processed while processing their
+            parent section, then their durations are not counted on the parent section duration.
 
-            elif command == "pull_origins":
-                successful_resquests += 1
-                forkpath = get_section_option( section, "path", generalSettingsConfigs )
+            @return the tuple `(duration, is_successful)`
+        """
+        parent_nested_time = getattr( g_section_timer, 'nested_time', 0 )
+        g_section_timer.nested_time = 0
 
-                run( "git pull --rebase", base_root_directory, forkpath )
-                self.recursiveily_process_submodules( base_root_directory, command, forkpath )
+        start_time = time.time()
 
-            elif command == "fetch_origins":
-                successful_resquests += 1
-                forkpath = get_section_option( section, "path", generalSettingsConfigs )
+        try:
+            is_successful = self.run_section_command( state, section, main_index ) is not False
 
-                run( "git fetch origin", base_root_directory, forkpath )
-                self.recursiveily_process_submodules( base_root_directory, command, forkpath )
+        finally:
+            elapsed_time = time.time() - start_time
+            nested_time  = g_section_timer.nested_time
 
-            else:
-                log( 1, "RunBackstrokeThread::run_general_command, Invalid command: " + str( command ) )
+            g_section_timer.nested_time = parent_nested_time + elapsed_time
 
-        # Only save the session file when finishing the main thread
-        if base_root_directory == CHANNEL_ROOT_DIRECTORY:
-            log.newline( count=2 )
+        return elapsed_time - nested_time, is_successful
 
-            if maximum_errors == MAXIMUM_REQUEST_ERRORS:
-                self.save_session_file(base_root_directory, lastSection, command, 1)
-                log( 1, "Congratulations! It was a successful execution." )
+    def run_section_command(self, state, section, main_index):
+        """
+            @return False when the section could not be processed
+        """
+        command = state.command
+        base_root_directory = state.base_root_directory
+        generalSettingsConfigs = state.generalSettingsConfigs
+
+        if command == "find_forks":
+            # https://docs.python.org/3/library/configparser.html#configparser.ConfigParser.get
+            forkUrl  = get_section_option( section, "url", generalSettingsConfigs )
+            forkpath = get_section_option( section, "path", generalSettingsConfigs )
+            upstream = get_section_option( section, "upstream", generalSettingsConfigs )
+
+            # log( 1, "forkpath: " + forkpath )
+            # log( 1, "upstream: " + upstream )
+            if len( upstream ) > 20:
+                state.add_successful_request()
+                forkUser, _           = parse_upstream( forkUrl )
+                user, repository      = parse_upstream( upstream )
+
+                repository_path = os.path.join( base_root_directory, forkpath )
+                store_path      = self.prepare_shared_store( repository_path, upstream )
+
+                # Find all forks, add them as remote and fetch them
+                try:
+                    forks = self.forks_finder.find_forks( user, repository )
+
+                except Exception as error:
+                    # Keep processing the other sections, as the failure is usually the remote API
+                    log_output( "Error: Could not list the `%s/%s` forks: %s", user, repository, error )
+                    state.main_state.add_failed_forks( section )
+                    return False
+
+                self.fetch_forks( repository_path, forks )
+
+                # Clean duplicate branches
+                result = remove_duplicate_branches( repository_path, [ "origin", forkUser, user ] )
+
+                if result and result.returncode != 0:
+                    log_output( "Warning: Could not remove the duplicated branches: %s", result.output )
+
+                self.move_to_shared_store( repository_path, store_path, forkpath )
 
             else:
-                log( 1, "Attention! There were errors on execution, please review its output." )
+                log_output( "\n\n" )
+                log_output( "Error, invalid/missing upstream: " + str( upstream ) )
 
-        return True
+        elif command == "merge_upstreams":
+            # https://docs.python.org/3/library/configparser.html#configparser.ConfigParser.get
+            forkpath = get_section_option( section, "path", generalSettingsConfigs )
+            downstream = get_section_option( section, "url", generalSettingsConfigs )
+
+            upstream = get_section_option( section, "upstream", generalSettingsConfigs )
+            branches = get_section_option( section, "branches", generalSettingsConfigs )
+            local_branch, upstream_branch = parser_branches( branches )
+
+            if not upstream:
+                log_output( "Skipping %s because there is not upstream defined...", section )
+                return
+
+            log_output( branches )
+            log_output( downstream )
+            log_output( upstream )
+            if not local_branch or not upstream_branch:
+                log_output( "\n\n" )
+                log_output( "ERROR! Invalid branches `%s`", branches )
+
+                if state.add_error() < 1:
+                    state.pool.stop()
+
+                return False
+
+            state.add_successful_request()
+            repository_path = os.path.join( base_root_directory, forkpath )
+            upstream_user, upstream_repository = parse_upstream( upstream )
+
+            if upstream_user not in get_git_remotes( repository_path ):
+                run( "git remote add %s %s" % ( upstream_user, upstream ), base_root_directory, forkpath )
+                clear_git_remotes_cache( repository_path )
+
+            # The fetches are always needed, then compare the fetched heads instead of querying them
+            outputs = []
+            outputs.append( self.run_remote( "git fetch origin", base_root_directory, forkpath ) )
+            outputs.append( self.run_remote( "git fetch %s" % ( upstream_user ), base_root_directory, forkpath ) )
+
+            merge_heads = {
+                "branches": branches,
+                "origin": get_local_head( repository_path, "refs/remotes/origin/%s" % local_branch ),
+                "upstream": get_local_head( repository_path, "refs/remotes/%s/%s" % ( upstream_user, upstream_branch ) ),
+            }
+
+            with self.merged_heads_lock:
+                merged_heads = self.merged_heads.get( forkpath )
+
+            if merge_heads["origin"] and merge_heads["upstream"] and merge_heads == merged_heads:
+                log_output( "Skipping %s because its origin and upstream did not change since the last merge...", section )
+                return
+
+            # The origin was already fetched, then rebase instead of pulling it again
+            outputs.append( run( "git checkout %s" % local_branch, base_root_directory, forkpath ) )
+            outputs.append( run( "git rebase origin/%s" % local_branch, base_root_directory, forkpath ) )
+            outputs.append( run( "git merge %s/%s" % ( upstream_user, upstream_branch ), base_root_directory, forkpath ) )
+
+            if merge_heads["origin"] and merge_heads["upstream"] and False not in outputs:
+
+                with self.merged_heads_lock:
+                    self.merged_heads[forkpath] = merge_heads
+
+        elif command == "create_upstreams" or command == "delete_remotes":
+            forkpath = get_section_option( section, "path", generalSettingsConfigs )
+            upstream = get_section_option( section, "upstream", generalSettingsConfigs )
+
+            if len( upstream ) > 20:
+                state.add_successful_request()
+                user, repository = parse_upstream( upstream )
+
+                repository_path = os.path.join( base_root_directory, forkpath )
+                remotes = get_git_remotes( repository_path )
+
+                if command == "create_upstreams":
+
+                    if user not in remotes:
+                        store_path = self.prepare_shared_store( repository_path, upstream )
+
+                        run( "git remote add %s %s" % ( user, upstream ), base_root_directory, forkpath )
+                        self.run_network( "git fetch %s" % ( user ), base_root_directory, forkpath )
+                        clear_git_remotes_cache( repository_path )
+
+                        self.move_to_shared_store( repository_path, store_path, forkpath )
+
+                else:
+                    # Discarding myself and my upstream
+                    remotes_list = [ remote for remote in remotes if remote not in ( "origin", user ) ]
+                    log_output( "Cleaning %d remotes: %s", len( remotes_list ), forkpath )
+
+                    result = remove_remotes( repository_path, remotes_list )
+
+                    if result and result.returncode != 0:
+                        log_output( "Warning: Could not remove the remotes references: %s", result.output )
+
+        elif command == "pull_origins":
+            state.add_successful_request()
+            forkpath = get_section_option( section, "path", generalSettingsConfigs )
+
+            # Only pull the nested submodules after the pull, as it can add or update them
+            self.run_network( "git pull --rebase", base_root_directory, forkpath )
+            self.recursiveily_process_submodules( state, forkpath, main_index )
+
+        elif command == "fetch_origins":
+            state.add_successful_request()
+            forkpath = get_section_option( section, "path", generalSettingsConfigs )
+
+            # Fetching does not change the nested submodules, then fetch them all at the same time
+            self.recursiveily_process_submodules( state, forkpath, main_index )
+            self.run_network( "git fetch origin", base_root_directory, forkpath )
+
+        else:
+            log_output( "RunBackstrokeThread::run_general_command, Invalid command: " + str( command ) )
+
+    def run_remote(self, command, *args):
+        """
+            Run a `command` which accesses the remote, after waiting for the rate limiter. When the
+            remote says the requests are being rate limited, all the workers wait before the next one.
+        """
+        return self.run_network( command, *args, rate_limiter=self.rate_limiter )
+
+    def run_network(self, command, *args, **kwargs):
+        """
+            Run a `command` which accesses the remote with the `network_policy`.
+
+            @param rate_limiter   a `TokenBucket` to acquire before running the command
+            @return the command output or False, as `run()`
+        """
+        command = shlex.split( command )
+        result  = self.network_policy.run( command, os.path.join( *args ), rate_limiter=kwargs.get( 'rate_limiter' ) )
+
+        log_output( "%s\n%s", " ".join( command ), result.output )
+        return result.output if result.returncode == 0 else False
+
+    def run_rate_limited(self, arguments, cwd):
+        return self.network_policy.run( arguments, cwd, rate_limiter=self.rate_limiter )
+
+    def fetch_forks(self, repository_path, forks):
+        """
+            Add the `forks` as remotes of the repository and fetch all of them.
+
+            @param forks   a list of tuples `(owner, clone_url)`
+        """
+        remotes = get_git_remotes( repository_path )
+        log_output( "Fetching %d forks on %s", len( forks ), repository_path )
 
-    @staticmethod
-    def save_session_file(base_root_directory, lastSection, command, request_index):
-        """ Only saves the session file when working on the main project submodules
-            instead overriding it with the nested submodules contents. """
+        for owner, clone_url in forks:
 
-        if base_root_directory == CHANNEL_ROOT_DIRECTORY:
-            lastSection[command] = request_index - 1
-            write_data_file( CHANNEL_SESSION_FILE, lastSection )
+            if owner not in remotes:
+                run_process( [ "git", "remote", "add", owner, clone_url ], repository_path )
 
-    def recursiveily_process_submodules(self, base_root_directory, command, forkpath):
-        base_root_directory    = os.path.join( base_root_directory, forkpath )
+        clear_git_remotes_cache( repository_path )
+        owners = [ owner for owner, _ in forks ]
+
+        for index in range( 0, len( owners ), REMOTES_PER_FETCH ):
+            result = self.run_rate_limited( [ "git", "fetch", "--no-tags", "--multiple" ] + owners[index:index + REMOTES_PER_FETCH ],
+                    repository_path )
+
+            if result.returncode != 0:
+                log_output( "Warning: Could not fetch some forks: %s", trim_output( result.output ) )
+
+    def prepare_shared_store(self, repository_path, upstream):
+        """
+            When the `shared_objects` directory is set, fetch the upstream project into its shared
+            object store and add the store as the repository alternate, so the next fetches on the
+            repository only download the objects which are not on the upstream project.
+
+            @return the shared store path or `None`
+        """
+
+        if not self.shared_objects:
+            return None
+
+        store_path = get_shared_store( self.shared_objects, upstream )
+        add_alternate( repository_path, store_path )
+
+        result = fetch_into_store( store_path, upstream, "upstream", runner=self.run_rate_limited )
+
+        if result.returncode != 0:
+            log_output( "Warning: Could not fetch the upstream `%s` into `%s`: %s", upstream, store_path, result.output )
+
+        return store_path
+
+    def move_to_shared_store(self, repository_path, store_path, namespace):
+
+        if store_path:
+            result = move_objects_to_store( repository_path, store_path, namespace )
+
+            if result.returncode != 0:
+                log_output( "Warning: Could not move the `%s` objects to `%s`: %s", repository_path, store_path, result.output )
+
+    def recursiveily_process_submodules(self, parent_state, forkpath, main_index):
+        """
+            Submit the nested submodules sections to the same workers processing their parent.
+        """
+        base_root_directory    = os.path.join( parent_state.base_root_directory, forkpath )
         nested_submodules_file = os.path.join( base_root_directory, ".gitmodules" )
 
         if os.path.exists( nested_submodules_file ):
-            self.run_general_command( base_root_directory, nested_submodules_file, command )
+            generalSettingsConfigs = load_gitmodules( nested_submodules_file )
+            sections = generalSettingsConfigs.sections()
+
+            state = GeneralCommandState( base_root_directory, parent_state.command,
+                    generalSettingsConfigs, len( sections ), self.jobs, parent_state )
+
+            pending_sections = []
+
+            for request_index, section in enumerate( sections, start=1 ):
+                expected_duration = state.get_expected_duration( section )
+                state.progress.add( expected_duration )
+                pending_sections.append( ( request_index, section, expected_duration ) )
+
+            if state.is_parallel:
+                pending_sections.sort( key=lambda pending_section: -pending_section[2] )
+
+            for request_index, section, expected_duration in pending_sections:
+                state.submit_section( section, request_index, "Nested", main_index, expected_duration )
+
+
+class GeneralCommandState(object):
+    """
+        Holds the data shared by the workers processing the sections of a `.gitmodules` file.
+    """
+
+    def __init__(self, base_root_directory, command, generalSettingsConfigs, sections_count, jobs, parent_state=None):
+        """
+            @param parent_state   the state of the `.gitmodules` file where this nested `.gitmodules`
+                                  file is, sharing its workers
+        """
+        self.lock = threading.Lock()
+
+        self.command = command
+        self.base_root_directory = base_root_directory
+        self.generalSettingsConfigs = generalSettingsConfigs
+
+        self.sections_count = sections_count
+        self.maximum_errors = MAXIMUM_REQUEST_ERRORS
+        self.successful_resquests = 0
+
+        if parent_state:
+            self.pool        = parent_state.pool
+            self.progress    = parent_state.progress
+            self.durations   = parent_state.durations
+            self.main_state  = parent_state.main_state
+            self.is_parallel = parent_state.is_parallel
+            self.checkpoint  = None
+
+        else:
+            # Only the main project sections run concurrently and save the session file, instead of
+            # overriding it with the nested submodules contents
+            is_main_project  = base_root_directory == CHANNEL_ROOT_DIRECTORY
+            self.is_parallel = is_main_project and jobs > 1
+            self.checkpoint  = CheckpointWriter( CHANNEL_SESSION_FILE, command ) if is_main_project else None
+
+            self.pool       = None
+            self.progress   = ParallelProgress( 0 )
+            self.durations  = DurationDatabase( COMMANDS_DURATIONS_FILE, command )
+            self.main_state = self
+
+            # How many sections are not finished for each main section, including its nested ones
+            self.pending_sections = collections.Counter()
+            self.failed_sections  = set()
+
+            # The sections which forks could not be listed, reported after all the sections finish
+            self.failed_forks = []
+
+    def submit_section(self, section, request_index, progress, main_index, expected_duration):
+        """
+            The section must already be added to the `progress`.
+        """
+
+        with self.main_state.lock:
+            self.main_state.pending_sections[main_index] += 1
+
+        self.pool.submit( self, section, request_index, progress, main_index, expected_duration )
+
+    def get_repository(self, section):
+        path = get_section_option( section, "path", self.generalSettingsConfigs ) or section
+        return get_repository_name( os.path.join( self.base_root_directory, path ) )
+
+    def get_expected_duration(self, section):
+        return self.durations.get_expected( self.get_repository( section ) )
+
+    def add_successful_request(self):
+
+        with self.lock:
+            self.successful_resquests += 1
+
+    def add_error(self):
+        """
+            @return how many errors are still acceptable
+        """
+        with self.lock:
+            self.maximum_errors -= 1
+            return self.maximum_errors
+
+    def add_failed_forks(self, section):
+
+        with self.lock:
+            self.failed_forks.append( section )
+
+    def is_finished(self, request_index):
+        return self.checkpoint and self.checkpoint.is_finished( request_index )
+
+    def finish_section(self, main_index, is_successful):
+        """
+            The main section only finishes after all its nested sections finish, and it is kept on the
+            session file when some of them failed, so it is processed again when resuming.
+        """
+
+        with self.lock:
+            self.pending_sections[main_index] -= 1
+
+            if not is_successful:
+                self.failed_sections.add( main_index )
+
+            if self.pending_sections[main_index] > 0 or main_index in self.failed_sections:
+                return
+
+            del self.pending_sections[main_index]
+
+        if self.checkpoint:
+            self.checkpoint.finish( main_index )
+
+
+def load_gitmodules(git_file_path):
+    log( 1, "RunBackstrokeThread::sections: " + git_file_path )
+
+    # https://pymotw.com/3/configparser/
+    generalSettingsConfigs = configparser.RawConfigParser()
+
+    # https://stackoverflow.com/questions/45415684/how-to-stop-tabs-on-python-2-7-rawconfigparser-throwing-parsingerror/
+    with open( git_file_path ) as fakeFile:
+        # https://stackoverflow.com/questions/22316333/how-can-i-resolve-typeerror-with-stringio-in-python-2-7
+        fakefile = io.StringIO( fakeFile.read().replace( u"\t", u"" ) )
+
+    generalSettingsConfigs._read( fakefile, git_file_path )
+    return generalSettingsConfigs
 
 
 def run(command, *args):
     command = shlex.split( command )
     basepath = os.path.join( *args )
 
-    output = command_line_interface.execute( command, basepath, live_output=True, short_errors=True )
-    if is_python_2:
-        log.clean( 1, output )
+    # The concurrent workers cannot print the live output, otherwise it would be interleaved
+    if is_output_buffered():
+        output = command_line_interface.execute( command, basepath, short_errors=True )
+        log_output( "%s\n%s", " ".join( command ), output )
+
+    else:
+        output = command_line_interface.execute( command, basepath, live_output=True, short_errors=True )
+
+        if is_python_2:
+            log.clean( 1, output )
 
     return output
 
 
+def get_github_token():
+    """
+        Read the GitHub API token from the same file or environment variable used by the
+        `create_pullrequests` command.
+    """
+    token_file = join_path( CHANNEL_ROOT_DIRECTORY, 'Local', 'GITHUBPULLREQUESTS_TOKEN' )
+
+    if os.path.exists( token_file ):
+
+        with io.open( token_file, "r", encoding='utf-8' ) as file:
+            return file.read().strip()
+
+    return os.environ.get( 'GITHUBPULLREQUESTS_TOKEN', "" )
+
+
+def get_local_head(repository_path, reference):
+    """
+        @return the commit id of the local `reference` or `None` when it does not exist
+    """
+    result = run_process( [ "git", "rev-parse", "--verify", "--quiet", reference + "^{commit}" ], repository_path )
+
+    if result.returncode != 0 or not result.output:
+        log_output( "Warning: Could not get the `%s` head: %s", reference, result.output )
+        return None
+
+    return result.output.strip()
+
+
+def get_repository_name(repository_path):
+    """
+        @return the repository path relative to the channel root, as it is saved on the reports
+    """
+    return os.path.relpath( repository_path, CHANNEL_ROOT_DIRECTORY ).replace( "\\", "/" )
+
+
 def parse_upstream( upstream ):
     """
         How to extract a substring from inside a string in Python?
@@ -628,9 +1223,19 @@ def print_command_line_arguments():
 
 
 def get_channel_root_from_project():
+    """
+        Returns the first project folder with the `.gitmodules`, `.gitignore` and some
+        `.sublime-project` file, caching it until the project folders change.
+    """
 
     if sublime:
-        active_window = sublime.active_window()
+        folders = tuple( sublime.active_window().folders() )
+        modified_times = tuple( get_modified_time( folder ) for folder in folders )
+
+        cached = g_project_roots.get( folders )
+
+        if cached and cached[0] == modified_times:
+            return cached[1]
 
         def is_valid_folder(folder):
 
@@ -644,20 +1249,47 @@ def get_channel_root_from_project():
 
             return False
 
-        for folder in active_window.folders():
+        channel_root = CHANNEL_ROOT_DIRECTORY
 
-            if is_valid_folder( folder ):
+        for folder in folders:
 
-                for root, dirs, files in os.walk( folder ):
-
-                    for file in files:
+            if is_valid_folder( folder ) and has_project_file( folder ):
+                channel_root = os.path.abspath( folder )
+                break
 
-                        if file.endswith( ".sublime-project" ):
-                            return os.path.abspath( folder )
+        g_project_roots[folders] = ( modified_times, channel_root )
+        return channel_root
 
     return CHANNEL_ROOT_DIRECTORY
 
 
+def has_project_file(folder, maximum_depth=PROJECT_SEARCH_DEPTH):
+    """
+        Look for a `.sublime-project` file up to `maximum_depth` directories below the `folder`,
+        without entering on the hidden directories, the git repositories as the packages submodules
+        and the Sublime Text `Data` folder directories as `Packages`.
+    """
+    folder_depth = folder.rstrip( os.sep ).count( os.sep )
+
+    for root, directories, files in os.walk( folder ):
+
+        for file in files:
+
+            if file.endswith( ".sublime-project" ):
+                return True
+
+        if root.count( os.sep ) - folder_depth >= maximum_depth:
+            del directories[:]
+
+        else:
+            directories[:] = [ directory for directory in directories
+                    if not directory.startswith( "." )
+                    and directory not in PROJECT_SEARCH_SKIPPED
+                    and not os.path.exists( os.path.join( root, directory, ".git" ) ) ]
+
+    return False
+
+
 #
 # Repositories which are a fork from outside the Github, which need manually checking.
 #
@@ -666,53 +1298,407 @@ def get_channel_root_from_project():
 # https://github.com/evandrocoan/SublimePreferencesEditor
 
 class RunGitForEachSubmodulesThread(threading.Thread):
+    """
+        Run the `git_commands` on each submodule, including the nested ones, stopping on the first
+        command which fails for each submodule. Each command is a list with the process arguments.
+
+        The nested submodules are only submitted after their parent submodule commands finish, as
+        they can checkout or pull the nested submodules `.gitmodules` and their commits.
+    """
+
+    report_file = FOREACH_REPORT_FILE
 
-    def __init__(self, git_command):
+    def __init__(self, git_commands, jobs=1, network_policy=None, command="foreach"):
+        """
+            @param command   the command name used to queue it on the job scheduler
+        """
         threading.Thread.__init__(self)
-        self.git_command = git_command
+        self.command = command
+        self.git_commands = git_commands
+        self.jobs = jobs or 1
+        self.network_policy = network_policy or get_network_policy()
+        self.durations = DurationDatabase( COMMANDS_DURATIONS_FILE, command )
+
+        self.results = []
+        self.results_lock = threading.Lock()
 
     def run(self):
 
-        with lock_context_manager() as is_allowed:
+        with g_running_commands.lock_context_manager( self.command ) as is_allowed:
             if not is_allowed: return
-            self.update_submodules( self.git_command )
 
-        free_mutex_lock()
+            try:
+                self.update_submodules()
+
+            except OperationCancelled as error:
+                log( 1, "%s The finished submodules were saved on: %s", error, self.report_file )
+
+            self.network_policy.log_failed_repositories()
 
-    def update_submodules(self, git_command):
-        error_list = []
+    def update_submodules(self):
         log( 1, "update_submodules::Current directory: " + CHANNEL_ROOT_DIRECTORY )
 
-        for _ in range(0, 100):
-            error_list.append( "Error! " )
+        progress = ParallelProgress( 0 )
+        pool     = WorkerPool( self.update_submodule, self.jobs )
 
-        # What is the most efficient string concatenation method in python?
-        # https://stackoverflow.com/questions/1316887/what-is-the-most-efficient-string-concatenation-method-in-python
-        error_string = ''.join( error_list )
+        try:
+            self.submit_submodules( pool, progress, CHANNEL_ROOT_DIRECTORY )
 
-        # git submodule foreach - Robust way to recursively commit a child module first?
-        # https://stackoverflow.com/questions/14846967/git-submodule-foreach-robust-way-to-recursively-commit-a-child-module-first
-        command  = "git submodule foreach --recursive "
+        except BaseException:
+            pool.stop()
+            raise
 
-        # Continue looping over submodules with the “git submodule foreach” command after a non-zero exit
-        # https://stackoverflow.com/questions/19728933/continue-looping-over-submodules-with-the-git-submodule-foreach-command-after
-        command += "\"date && %s && printf '\\n' || printf '%s\\n\\n\\n\\n\\n'\"" % ( git_command, error_string )
+        finally:
 
-        log( 1, "Command: %s", [command] )
+            # Also report the finished submodules when the operation was cancelled
+            try:
+                pool.join()
 
-        if sublime:
-            run(command, CHANNEL_ROOT_DIRECTORY )
+            finally:
+                self.sort_results()
+                write_data_file( self.report_file, self.results )
 
-        else:
-            # Python os.system() call runs in incorrect directory
-            # https://stackoverflow.com/questions/18066278/python-os-system-call-runs-in-incorrect-directory
-            os.chdir( CHANNEL_ROOT_DIRECTORY )
+                self.durations.save()
+
+                self.log_summary()
+
+    def submit_submodules(self, pool, progress, parent_path):
+        """
+            Submit the submodules directly inside the `parent_path`, without their nested ones.
+        """
+        repositories = [ ( repository_path, self.durations.get_expected( get_repository_name( repository_path ) ) )
+                for repository_path in iterate_submodules( parent_path, recursive=False ) ]
+
+        for _, expected_duration in repositories:
+            progress.add( expected_duration )
+
+        # Start the slowest submodules first, so they do not end up running alone on the end of the run
+        if self.jobs > 1:
+            repositories.sort( key=lambda repository: -repository[1] )
+
+        for repository_path, expected_duration in repositories:
+            pool.submit( pool, repository_path, progress, expected_duration )
+
+    def update_submodule(self, pool, repository_path, progress, expected_duration):
+
+        check_cancellation()
+
+        outputs    = []
+        duration   = 0
+        returncode = 0
+        repository = get_repository_name( repository_path )
+
+        results = self.run_commands( repository_path )
+        check_cancellation()
+
+        for git_command, result in results:
+            duration  += result.duration
+            returncode = result.returncode
+            outputs.append( "$ %s\n%s" % ( " ".join( git_command ), result.output ) )
+
+        output = trim_output( "\n".join( outputs ) )
+
+        if returncode == 0:
+            self.durations.add( repository, duration )
+
+        with output_buffer( self.jobs > 1 ):
+            log_output( "%s... %s (exit code %d)\n%s\n", progress.finish( expected_duration ), repository, returncode, output )
+
+        result = {
+            "repository": repository,
+            "returncode": returncode,
+            "duration": round( duration, 3 ),
+            "output": output,
+        }
+
+        result.update( self.get_extra_results( repository_path ) )
+
+        with self.results_lock:
+            self.results.append( result )
+
+        # Only now the nested submodules are checked out with the parent submodule commits
+        self.submit_submodules( pool, progress, repository_path )
+
+    def get_extra_results(self, repository_path):
+        """
+            @return a dictionary with more fields to save on the submodule report
+        """
+        return {}
 
-            # Calling an external command in Python
-            # https://stackoverflow.com/questions/89228/calling-an-external-command-in-python
-            os.system( command )
+    def sort_results(self):
+        self.results.sort( key=lambda result: result['repository'] )
+
+    def run_commands(self, repository_path):
+        """
+            @return a list of tuples `(git_command, ProcessResult)` of the commands run on the
+                    repository, where only the last one can have failed
+        """
+        results = []
+
+        for git_command in self.git_commands:
+            result = self.network_policy.run( git_command, repository_path )
+            results.append( ( git_command, result ) )
+
+            if result.returncode != 0:
+                break
+
+        return results
+
+    def log_summary(self):
+        failures = [ result for result in self.results if result['returncode'] != 0 ]
+
+        log.newline( count=2 )
+        log( 1, "Finished %d repositories with %d failures. The full report is on: %s",
+                len( self.results ), len( failures ), self.report_file )
+
+        if failures:
+            repository_width = max( len( result['repository'] ) for result in failures )
+            lines = [ "{:<{width}s}  {:>4s}  {:>8s}  {:s}".format( "Repository", "Exit", "Duration", "Output",
+                    width=repository_width ) ]
+
+            for result in failures:
+                last_line = result['output'].splitlines()[-1] if result['output'] else ""
+
+                lines.append( "{:<{width}s}  {:>4d}  {:>8s}  {:s}".format( result['repository'],
+                        result['returncode'], format_duration( result['duration'] ), last_line[:80],
+                        width=repository_width ) )
+
+            log.clean( 1, "\n".join( lines ) )
+
+
+class PushMissingTagsThread(RunGitForEachSubmodulesThread):
+    """
+        Push to the origin only the local tags it does not have, instead of negotiating all the tags
+        with `git push --tags`, and skip the push when there are no missing tags.
+    """
+
+    def __init__(self, jobs=1, network_policy=None):
+        RunGitForEachSubmodulesThread.__init__( self, [], jobs, network_policy, "push_tags" )
+
+    def run_commands(self, repository_path):
+        list_remote_command = [ "git", "ls-remote", "--tags", "origin" ]
+        remote_result = self.network_policy.run( list_remote_command, repository_path )
+
+        results = [ ( list_remote_command, remote_result ) ]
+
+        if remote_result.returncode != 0:
+            return results
+
+        list_local_command = [ "git", "for-each-ref", "--format=%(refname)", "refs/tags" ]
+        local_result = run_process( list_local_command, repository_path )
+
+        if local_result.returncode != 0:
+            results.append( ( list_local_command, local_result ) )
+            return results
+
+        # The annotated tags are listed twice, as `refs/tags/name` and `refs/tags/name^{}`
+        remote_tags = set( line.split()[-1].replace( "^{}", "" ) for line in remote_result.output.splitlines() if line.strip() )
+        missing_tags = sorted( set( local_result.output.splitlines() ) - remote_tags )
+
+        for index in range( 0, len( missing_tags ), TAGS_PER_PUSH ):
+            push_command = [ "git", "push", "origin" ] + missing_tags[index:index + TAGS_PER_PUSH]
+            push_result  = self.network_policy.run( push_command, repository_path )
+
+            results.append( ( push_command, push_result ) )
+
+            if push_result.returncode != 0:
+                break
+
+        return results
+
+
+class GitMaintenanceThread(RunGitForEachSubmodulesThread):
+    """
+        Run the maintenance tasks on all submodules, timing the same tags queries run by the channel
+        generation before and after them, as they slow down with the loose references and objects.
+    """
+    report_file = MAINTENANCE_REPORT_FILE
+
+    def __init__(self, jobs=1):
+        RunGitForEachSubmodulesThread.__init__( self, [
+                [ "git", "pack-refs", "--all", "--prune" ],
+                # Without `-a`, only the loose objects are packed, and `-l` keeps the alternates objects
+                [ "git", "repack", "-d", "-l", "-q" ],
+                [ "git", "prune", "--expire=2.weeks.ago" ],
+                [ "git", "commit-graph", "write", "--reachable" ],
+            ], jobs, command="git_maintenance" )
+
+        self.query_durations = {}
+
+    def run_commands(self, repository_path):
+        before_duration = self.get_tags_query_duration( repository_path )
+        results = RunGitForEachSubmodulesThread.run_commands( self, repository_path )
+        after_duration = self.get_tags_query_duration( repository_path )
+
+        with self.results_lock:
+            self.query_durations[repository_path] = ( before_duration, after_duration )
+
+        return results
+
+    def get_extra_results(self, repository_path):
+
+        with self.results_lock:
+            before_duration, after_duration = self.query_durations.pop( repository_path )
+
+        return { "query_before": round( before_duration, 4 ), "query_after": round( after_duration, 4 ) }
+
+    def get_tags_query_duration(self, repository_path):
+        """
+            @return the fastest duration of listing the tags and reading the last tag date, as
+                    `get_git_latest_tag()` and `get_git_tag_date()` do
+        """
+        durations = []
+
+        for _ in range( TAGS_QUERY_RUNS ):
+            result = run_process( [ "git", "tag", "--sort=-creatordate", "--sort=version:refname" ], repository_path )
+            duration = result.duration
+            tags = result.output.splitlines() if result.returncode == 0 else []
+
+            if tags:
+                result = run_process( [ "git", "log", "-1", "--pretty=format:%ci", "refs/tags/%s" % tags[-1] ], repository_path )
+                duration += result.duration
+
+            durations.append( duration )
+
+        return min( durations )
+
+    def log_summary(self):
+        RunGitForEachSubmodulesThread.log_summary( self )
+
+        if not self.results:
+            return
+
+        total_before = sum( result['query_before'] for result in self.results )
+        total_after  = sum( result['query_after'] for result in self.results )
+
+        log( 1, "The tags queries took %.3f seconds before and %.3f seconds after the maintenance.",
+                total_before, total_after )
+
+        slowest = sorted( self.results, key=lambda result: result['query_before'], reverse=True )[:10]
+        repository_width = max( len( result['repository'] ) for result in slowest )
+
+        lines = [ "{:<{width}s}  {:>8s}  {:>8s}".format( "Repository", "Before", "After", width=repository_width ) ]
+
+        for result in slowest:
+            lines.append( "{:<{width}s}  {:>8.3f}  {:>8.3f}".format( result['repository'],
+                    result['query_before'], result['query_after'], width=repository_width ) )
+
+        log.clean( 1, "\n".join( lines ) )
+
+
+class SubmodulesStatisticsThread(RunGitForEachSubmodulesThread):
+    """
+        Collect the disk and git objects statistics of all submodules, to find out which ones are
+        worth running the maintenance or cleaning their remotes.
+    """
+    report_file = STATISTICS_REPORT_FILE
+
+    def __init__(self, jobs=1, sort_by=None):
+        RunGitForEachSubmodulesThread.__init__( self, [
+                [ "git", "count-objects", "-v" ],
+                [ "git", "for-each-ref", "--format=%(refname)" ],
+            ], jobs, command="statistics" )
+
+        self.sort_by = sort_by or "disk_size"
+        self.statistics = {}
+
+    def run_commands(self, repository_path):
+        results = RunGitForEachSubmodulesThread.run_commands( self, repository_path )
+        statistics = dict( ( field, 0 ) for field in STATISTICS_FIELDS )
+
+        for git_command, result in results:
+
+            if result.returncode != 0:
+                continue
+
+            if git_command[1] == "count-objects":
+                counts = dict( line.split( ": ", 1 ) for line in result.output.splitlines() if ": " in line )
+
+                statistics["loose_objects"] = int( counts.get( "count", 0 ) )
+                statistics["loose_size"]    = int( counts.get( "size", 0 ) )
+                statistics["objects"]       = statistics["loose_objects"] + int( counts.get( "in-pack", 0 ) )
+                statistics["packs"]         = int( counts.get( "packs", 0 ) )
+                statistics["pack_size"]     = int( counts.get( "size-pack", 0 ) )
+
+            else:
+                references = result.output.splitlines()
+
+                statistics["refs"]            = len( references )
+                statistics["tags"]            = sum( 1 for reference in references if reference.startswith( "refs/tags/" ) )
+                statistics["remote_branches"] = sum( 1 for reference in references if reference.startswith( "refs/remotes/" ) )
+
+        statistics["remotes"]       = len( get_git_remotes( repository_path ) )
+        statistics["worktree_size"] = get_worktree_size( repository_path ) // 1024
+        statistics["disk_size"]     = statistics["pack_size"] + statistics["loose_size"] + statistics["worktree_size"]
+
+        with self.results_lock:
+            self.statistics[repository_path] = statistics
+
+        # Their output is already on the statistics
+        return [ ( git_command, result if result.returncode != 0 else result._replace( output="" ) )
+                for git_command, result in results ]
+
+    def get_extra_results(self, repository_path):
+
+        with self.results_lock:
+            return self.statistics.pop( repository_path )
+
+    def sort_results(self):
+        self.results.sort( key=lambda result: ( -result[self.sort_by], result['repository'] ) )
+
+    def log_summary(self):
+        RunGitForEachSubmodulesThread.log_summary( self )
+
+        if not self.results:
+            return
+
+        rows = self.results[:STATISTICS_TABLE_ROWS]
+
+        log( 1, "The %d submodules use %.1f MiB, the %d biggest by `%s` are:", len( self.results ),
+                sum( result['disk_size'] for result in self.results ) / 1024.0, len( rows ), self.sort_by )
+
+        repository_width = max( len( result['repository'] ) for result in rows )
+
+        lines = [ "{:<{width}s}  {:>9s}  {:>9s}  {:>9s}  {:>8s}  {:>7s}  {:>6s}  {:>6s}  {:>7s}".format( "Repository",
+                "Disk MiB", "Pack MiB", "Tree MiB", "Objects", "Loose", "Refs", "Tags", "Remotes",
+                width=repository_width ) ]
+
+        for result in rows:
+            lines.append( "{:<{width}s}  {:>9.1f}  {:>9.1f}  {:>9.1f}  {:>8d}  {:>7d}  {:>6d}  {:>6d}  {:>7d}".format(
+                    result['repository'], result['disk_size'] / 1024.0, result['pack_size'] / 1024.0,
+                    result['worktree_size'] / 1024.0, result['objects'], result['loose_objects'],
+                    result['refs'], result['tags'], result['remotes'], width=repository_width ) )
+
+        log.clean( 1, "\n".join( lines ) )
+
+
+def get_worktree_size(repository_path):
+    """
+        @return the size in bytes of the repository files, without its git directory and its nested
+                submodules, which are counted by themselves
+    """
+    total_size = 0
+
+    for root, directories, files in os.walk( repository_path ):
+        directories[:] = [ directory for directory in directories
+                if not os.path.exists( os.path.join( root, directory, ".git" ) ) and directory != ".git" ]
+
+        for file in files:
+            file_path = os.path.join( root, file )
+
+            if file != ".git" and not os.path.islink( file_path ):
+                total_size += get_file_size( file_path )
+
+    return total_size
+
+
+def get_file_size(file_path):
+
+    try:
+        return os.path.getsize( file_path )
 
-        log( 1, "Process finished! If there are any, review its log output looking for 'Error!' messages." )
+    except OSError:
+        return 0
 
 
 if __name__ == "__main__":